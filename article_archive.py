@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    published_at TEXT NOT NULL,
+    title TEXT NOT NULL,
+    author TEXT,
+    image_path TEXT,
+    record TEXT NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS article_tags (
+    article_id INTEGER NOT NULL REFERENCES articles(id),
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_published_at ON articles(published_at);
+CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title);
+CREATE INDEX IF NOT EXISTS idx_articles_author ON articles(author);
+CREATE INDEX IF NOT EXISTS idx_article_tags_tag ON article_tags(tag, article_id);
+"""
+
+
+def to_iso(date_text):
+    """Дата Tilda (дд.мм.гггг чч:мм) в сортируемый ISO-формат"""
+    try:
+        return datetime.datetime.strptime(date_text, "%d.%m.%Y %H:%M").strftime("%Y-%m-%dT%H:%M")
+    except (TypeError, ValueError):
+        return datetime.datetime.now().strftime("%Y-%m-%dT%H:%M")
+
+
+class ArticleArchive:
+    """Архив статей только на добавление с индексами по дате, тегам, автору и заголовку
+
+    Единственное изменение записи — подстановка готового изображения вместо временного.
+    Изменённая запись получает следующий номер ревизии архива, по которому сайт
+    и очередь публикаций находят уже обработанные статьи, требующие обновления.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('ARTICLE_ARCHIVE', 'articles.db')
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(SCHEMA)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(articles)")}
+        if "revision" not in columns:
+            self.connection.execute("ALTER TABLE articles ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_articles_revision ON articles(revision)")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, record):
+        """Добавление статьи, возвращает её номер в архиве"""
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO articles (published_at, title, author, image_path, record) VALUES (?, ?, ?, ?, ?)",
+                (
+                    to_iso(record.get("date")),
+                    record.get("title", ""),
+                    record.get("author"),
+                    record.get("image_path"),
+                    json.dumps(record, ensure_ascii=False)
+                )
+            )
+            article_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO article_tags (article_id, tag) VALUES (?, ?)",
+                [(article_id, tag) for tag in record.get("tags", [])]
+            )
+        return article_id
+
+    def replace_image(self, article_id, image_path):
+        """Замена изображения статьи (готовое вместо временного), возвращает обновлённую запись"""
+        row = self.connection.execute("SELECT record FROM articles WHERE id = ?", (article_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(json.loads(row[0]), image_path=image_path)
+        # Варианты относились к временному изображению
+        record.pop("image_variants", None)
+        record.pop("image_srcset", None)
+        with self.connection:
+            self.connection.execute(
+                "UPDATE articles SET image_path = ?, record = ?, "
+                "revision = (SELECT MAX(revision) FROM articles) + 1 WHERE id = ?",
+                (image_path, json.dumps(record, ensure_ascii=False), article_id))
+        return record
+
+    def _records(self, query, params):
+        return [json.loads(row[0]) for row in self.connection.execute(query, params)]
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def latest(self, limit=10):
+        """Последние статьи"""
+        return self._records(
+            "SELECT record FROM articles ORDER BY published_at DESC, id DESC LIMIT ?", (limit,))
+
+    def by_tag(self, tag, limit=10):
+        """Последние статьи с тегом"""
+        return self._records(
+            "SELECT a.record FROM article_tags t JOIN articles a ON a.id = t.article_id "
+            "WHERE t.tag = ? ORDER BY a.published_at DESC, a.id DESC LIMIT ?", (tag, limit))
+
+    def by_author(self, author, limit=10):
+        """Последние статьи автора"""
+        return self._records(
+            "SELECT record FROM articles WHERE author = ? "
+            "ORDER BY published_at DESC, id DESC LIMIT ?", (author, limit))
+
+    def by_title(self, title, limit=10):
+        """Статьи с заголовком, начинающимся с title"""
+        return self._records(
+            "SELECT record FROM articles WHERE title >= ? AND title < ? "
+            "ORDER BY published_at DESC, id DESC LIMIT ?", (title, title + "\uffff", limit))
+
+    def date_range(self, start, end, limit=100):
+        """Статьи за период, даты в формате ГГГГ-ММ-ДД включительно"""
+        return self._records(
+            "SELECT record FROM articles WHERE published_at >= ? AND published_at < ? "
+            "ORDER BY published_at DESC, id DESC LIMIT ?", (start, end + "\uffff", limit))
+
+    def last_id(self):
+        """Номер последней статьи в архиве"""
+        return self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+
+    def id_range(self, first_id, last_id):
+        """Статьи с номерами first_id..last_id в виде пар (номер, запись)"""
+        rows = self.connection.execute(
+            "SELECT id, record FROM articles WHERE id BETWEEN ? AND ? ORDER BY id", (first_id, last_id))
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def last_revision(self):
+        """Номер последнего изменения записей архива (0, если записи не менялись)"""
+        return self.connection.execute("SELECT COALESCE(MAX(revision), 0) FROM articles").fetchone()[0]
+
+    def updated_since(self, revision, max_id=None):
+        """Статьи, изменённые после ревизии revision (с номером не больше max_id), в виде пар (номер, запись)"""
+        rows = self.connection.execute(
+            "SELECT id, record FROM articles WHERE revision > ? AND id <= ? ORDER BY revision",
+            (revision, self.last_id() if max_id is None else max_id))
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def image_references(self):
+        """Изображения всех статей архива"""
+        rows = self.connection.execute("SELECT DISTINCT image_path FROM articles")
+        return {row[0] for row in rows if row[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Архив сгенерированных статей")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # Параметры вывода общие для всех запросов и указываются после команды: latest -n 5
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--json", action="store_true", help="вывод полных записей в JSON")
+    output.add_argument("-n", "--limit", type=int, default=10, help="сколько статей вывести")
+
+    subparsers.add_parser("latest", parents=[output], help="последние статьи")
+    subparsers.add_parser("count", help="число статей в архиве")
+    subparsers.add_parser("tag", parents=[output], help="статьи с тегом").add_argument("tag")
+    subparsers.add_parser("author", parents=[output], help="статьи автора").add_argument("author")
+    subparsers.add_parser("title", parents=[output], help="статьи по началу заголовка").add_argument("title")
+    range_parser = subparsers.add_parser("range", parents=[output], help="статьи за период")
+    range_parser.add_argument("start", help="ГГГГ-ММ-ДД")
+    range_parser.add_argument("end", help="ГГГГ-ММ-ДД")
+    args = parser.parse_args()
+
+    with ArticleArchive() as archive:
+        if args.command == "count":
+            print(archive.count())
+            return
+
+        if args.command == "latest":
+            records = archive.latest(args.limit)
+        elif args.command == "tag":
+            records = archive.by_tag(args.tag, args.limit)
+        elif args.command == "author":
+            records = archive.by_author(args.author, args.limit)
+        elif args.command == "title":
+            records = archive.by_title(args.title, args.limit)
+        else:
+            records = archive.date_range(args.start, args.end, args.limit)
+
+    for record in records:
+        if args.json:
+            print(json.dumps(record, ensure_ascii=False))
+        else:
+            print(f"{record['date']}  {record['title']}  ({record.get('author', '—')})")
+
+
+if __name__ == "__main__":
+    main()
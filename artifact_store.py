@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import hashlib
+import json
+import os
+
+from article_archive import ArticleArchive
+
+
+class ArtifactStore:
+    """Хранилище изображений с адресацией по содержимому"""
+
+    def __init__(self, root=None):
+        self.root = root or os.environ.get('ARTIFACT_DIR', 'images')
+
+    @staticmethod
+    def file_hash(path):
+        """SHA-256 содержимого файла"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def put_file(self, path):
+        """Перенос файла в хранилище, одинаковые изображения хранятся один раз"""
+        os.makedirs(self.root, exist_ok=True)
+        extension = os.path.splitext(path)[1] or '.jpg'
+        blob_path = f"{self.root}/{self.file_hash(path)}{extension}"
+
+        if os.path.exists(blob_path):
+            os.remove(path)
+            print(f"♻️ Изображение уже есть в хранилище: {blob_path}")
+        else:
+            os.replace(path, blob_path)
+        return blob_path
+
+    def blobs(self):
+        """Все файлы хранилища"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(f"{self.root}/{name}" for name in os.listdir(self.root)
+                      if os.path.isfile(os.path.join(self.root, name)))
+
+    def variants(self):
+        """Уменьшенные копии изображений (images/variants/<sha256>-<размер>.<формат>)"""
+        variants_dir = os.path.join(self.root, 'variants')
+        if not os.path.isdir(variants_dir):
+            return []
+        return sorted(f"{self.root}/variants/{name}" for name in os.listdir(variants_dir))
+
+    def gc(self, referenced, dry_run=False):
+        """Удаление изображений, на которые не ссылается ни одна статья, и их вариантов"""
+        referenced = set(referenced)
+        removed = [path for path in self.blobs() if path not in referenced]
+        kept_hashes = {os.path.splitext(os.path.basename(path))[0] for path in referenced}
+        removed += [path for path in self.variants()
+                    if os.path.basename(path).split('-')[0] not in kept_hashes]
+        if not dry_run:
+            for path in removed:
+                os.remove(path)
+        return removed
+
+
+def retained_references(tilda_path='tilda_data.json'):
+    """Изображения статей архива и текущей статьи Tilda
+
+    Сайт собирает страницу для каждой статьи архива, поэтому сохраняются
+    изображения всех статей, а не только последних.
+    """
+    references = set()
+
+    if os.path.exists(tilda_path):
+        with open(tilda_path, 'r', encoding='utf-8') as f:
+            references.add(json.load(f).get('image_path'))
+
+    with ArticleArchive() as archive:
+        references |= archive.image_references()
+
+    references.discard(None)
+    return references
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Хранилище изображений статей")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gc_parser = subparsers.add_parser("gc", help="удалить изображения без ссылок")
+    gc_parser.add_argument("--dry-run", action="store_true",
+                           help="только показать, что будет удалено")
+    args = parser.parse_args()
+
+    store = ArtifactStore()
+    removed = store.gc(retained_references(), dry_run=args.dry_run)
+    for path in removed:
+        print(f"🗑️ {path}")
+    print(f"✅ Удалено изображений: {len(removed)}, осталось: {len(store.blobs())}")
+
+
+if __name__ == "__main__":
+    main()
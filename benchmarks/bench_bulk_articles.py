@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Сравнение скорости generate_articles и generate_article в цикле"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bulk_articles
+from news_generator import ContentGenerator
+
+
+def measure(label, count, produce):
+    started = time.perf_counter()
+    total_chars = 0
+    for article in produce():
+        total_chars += len(article)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {count:>9} статей  {elapsed:8.3f} с  {count / elapsed:12.0f} статей/с")
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000, help="статей для generate_articles")
+    parser.add_argument("--loop-count", type=int, default=2_000, help="статей для generate_article в цикле")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        generator = ContentGenerator()
+
+        def loop():
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(args.loop_count):
+                    yield generator.generate_article()
+
+        baseline = measure("generate_article в цикле", args.loop_count, loop)
+
+        backends = ["python"] + (["numpy"] if bulk_articles.numpy is not None else [])
+        list(generator.generate_articles(0))  # подготовка словарей и шаблонов
+        for backend in backends:
+            bulk = measure(f"generate_articles ({backend})", args.count,
+                           lambda: generator.synthesizer.generate(args.count, args.seed, backend=backend))
+            print(f"⚡ Ускорение: x{bulk / baseline:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Офлайн-замеры генераторов против локальной заглушки Unsplash и Hugging Face
+
+Для каждого варианта скрипта измеряются холодный старт (запуск интерпретатора
+и импорт модуля), время этапов из строки «⏱️ Этапы», полное время запуска и
+пропускная способность. Результат сохраняется в JSON для сравнения коммитов.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from stub_server import DEFAULT_CONFIG, StubServer, add_config_arguments
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VARIANTS = {
+    "news_generator": "news_generator.py",
+    "update-news": "update-news.py",
+    "news-generator": "news-generator.py"
+}
+
+STAGES_LINE = re.compile(
+    r"Этапы: статья ([\d.]+) с, изображение ([\d.]+) с, Tilda ([\d.]+) с, всего ([\d.]+) с")
+
+COLD_START = (
+    "import importlib.util, sys; sys.path.insert(0, {root!r}); "
+    "spec = importlib.util.spec_from_file_location('variant', {path!r}); "
+    "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+)
+
+
+def stats(values):
+    """Минимум, медиана, p95 и среднее"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        "n": len(ordered),
+        "min": round(ordered[0], 4),
+        "p50": round(ordered[len(ordered) // 2], 4),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "mean": round(sum(ordered) / len(ordered), 4)
+    }
+
+
+def run(command, env, cwd):
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} завершился с кодом {completed.returncode}:\n{completed.stderr}")
+    return elapsed, completed.stdout
+
+
+def bench_variant(script, runs, batch, env):
+    """Замеры одного варианта, каждый запуск в чистом каталоге"""
+    path = os.path.join(ROOT, script)
+    cold, total, stages = [], [], {"article": [], "image": [], "tilda": [], "total": []}
+
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            elapsed, _ = run([sys.executable, "-c", COLD_START.format(root=ROOT, path=path)], env, workdir)
+            cold.append(elapsed)
+
+            elapsed, output = run([sys.executable, path], env, workdir)
+            total.append(elapsed)
+            for match in STAGES_LINE.finditer(output):
+                for stage, value in zip(stages, match.groups()):
+                    stages[stage].append(float(value))
+
+    result = {
+        "cold_start_seconds": stats(cold),
+        "end_to_end_seconds": stats(total),
+        "stage_seconds": {stage: stats(values) for stage, values in stages.items()},
+        "runs_per_second": round(runs / sum(total), 4)
+    }
+
+    # Пакетный режим: один процесс на batch статей
+    if batch and script == "news_generator.py":
+        with tempfile.TemporaryDirectory() as workdir:
+            elapsed, _ = run([sys.executable, path, "--count", str(batch), "--jsonl", "batch.jsonl"], env, workdir)
+        result["batch"] = {"articles": batch, "seconds": round(elapsed, 4),
+                           "articles_per_second": round(batch / elapsed, 4)}
+    return result
+
+
+def compare(current, baseline_path):
+    """Изменение медиан относительно сохранённого результата"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    print(f"\n📊 Сравнение с {baseline.get('commit')} ({baseline_path})")
+    for name, result in current["variants"].items():
+        old = baseline.get("variants", {}).get(name)
+        if not old:
+            continue
+        for metric in ("cold_start_seconds", "end_to_end_seconds"):
+            new_p50, old_p50 = result[metric]["p50"], old[metric]["p50"]
+            change = (new_p50 - old_p50) / old_p50 * 100 if old_p50 else 0.0
+            print(f"  {name:<16} {metric:<20} {old_p50:8.3f} → {new_p50:8.3f} с ({change:+.1f}%)")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument("--runs", type=int, default=5, help="запусков на вариант")
+    parser.add_argument("--batch", type=int, default=20, help="статей в пакетном замере news_generator.py")
+    parser.add_argument("--output", default=None, help="файл результатов (по умолчанию benchmarks/results/)")
+    parser.add_argument("--compare", default=None, help="JSON прошлого замера для сравнения")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    config = {name: getattr(args, name, value) for name, value in DEFAULT_CONFIG.items()}
+    server = StubServer(**config).start()
+    env = dict(os.environ, UNSPLASH_BASE=server.base_url, HF_API_BASE=server.base_url, HF_API_TOKEN="")
+    env.pop("METRICS_PROMETHEUS", None)
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "server": config,
+        "variants": {}
+    }
+
+    for name in args.variants:
+        print(f"⏱️ {name}: {args.runs} запусков...")
+        result = bench_variant(VARIANTS[name], args.runs, args.batch, env)
+        results["variants"][name] = result
+        print(f"   холодный старт p50 {result['cold_start_seconds']['p50']:.3f} с, "
+              f"весь запуск p50 {result['end_to_end_seconds']['p50']:.3f} с")
+        if "batch" in result:
+            print(f"   пакет: {result['batch']['articles_per_second']:.1f} статей/с")
+
+    results["server_requests"] = server.requests
+    server.shutdown()
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"{results['timestamp'].replace(':', '')}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"💾 Результаты: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
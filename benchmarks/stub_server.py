@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Локальная замена Unsplash, api-inference.huggingface.co и CMS (POST /cms) для офлайн-замеров"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONFIG = {
+    "image_latency": 0.05,       # задержка ответа Unsplash, с
+    "text_latency": 0.5,         # задержка текстовой модели, с
+    "sd_latency": 2.0,           # задержка Stable Diffusion, с
+    "jitter": 0.2,               # случайный разброс задержки, доля
+    "error_rate": 0.0,           # доля ответов 500
+    "loading_rate": 0.0,         # доля ответов 503 «модель загружается»
+    "estimated_time": 20.0,      # estimated_time в ответе 503
+    "image_size": 150_000,       # размер изображения, байт
+    "publish_latency": 0.05,     # задержка ответа CMS, с
+    "rate_limit_rate": 0.0,      # доля ответов CMS 429 с Retry-After
+    "retry_after": 1,            # Retry-After в ответе 429, с
+    "model_latency": {},         # задержка отдельных моделей вместо text_latency/sd_latency, с
+    "path_latency": {},          # задержка отдельных путей GET вместо image_latency, с
+    "seed": 1
+}
+
+ARTICLE = ("Исследователи представили новую архитектуру нейронной сети, которая заметно "
+           "быстрее обрабатывает длинные тексты и требует меньше памяти. ") * 8
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "StubServer/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def _delay(self, seconds):
+        jitter = self.config["jitter"]
+        with self.server.lock:
+            factor = 1 + self.server.rng.uniform(-jitter, jitter)
+        time.sleep(max(0.0, seconds * factor))
+
+    def _roll(self, rate):
+        with self.server.lock:
+            return self.server.rng.random() < rate
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Клиент уже получил ответ от другого запроса
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def _image_bytes(self, key):
+        """Детерминированные «изображения» заданного размера"""
+        seed = hashlib.sha256(key.encode("utf-8")).digest()
+        size = self.config["image_size"]
+        return (seed * (size // len(seed) + 1))[:size]
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        self.server.count("GET " + path)
+        self._delay(self.config["path_latency"].get(path, self.config["image_latency"]))
+        if self._roll(self.config["error_rate"]):
+            self._send_json(500, {"error": "stub error"})
+            return
+
+        body = self._image_bytes(path)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", "image/jpeg", {"ETag": etag})
+            return
+        self._send(200, body, "image/jpeg", {"ETag": etag, "Cache-Control": "max-age=0"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.split("?")[0] == "/cms":
+            self._publish(payload)
+            return
+        model = self.path[len("/models/"):]
+        self.server.count("POST " + model)
+        is_image = "stable-diffusion" in model
+
+        self._delay(self.config["model_latency"].get(
+            model, self.config["sd_latency"] if is_image else self.config["text_latency"]))
+        if self._roll(self.config["loading_rate"]):
+            self._send_json(503, {"error": f"Model {model} is currently loading",
+                                  "estimated_time": self.config["estimated_time"]})
+            return
+        if self._roll(self.config["error_rate"]):
+            self._send_json(500, {"error": "stub error"})
+            return
+
+        if is_image:
+            self._send(200, self._image_bytes(model + json.dumps(payload)), "image/jpeg")
+        else:
+            self._send_json(200, [{"generated_text": f"{ARTICLE}\n\n({model})"}])
+
+
+    def _publish(self, payload):
+        """Приём пачки публикаций: лимит запросов, ошибки и учёт повторов по ключам"""
+        self.server.count("POST /cms")
+        self._delay(self.config["publish_latency"])
+        if self._roll(self.config["rate_limit_rate"]):
+            self._send(429, b'{"error": "rate limited"}', "application/json",
+                       {"Retry-After": str(self.config["retry_after"])})
+            return
+        if self._roll(self.config["error_rate"]):
+            self._send_json(500, {"error": "stub error"})
+            return
+
+        duplicates = 0
+        with self.server.lock:
+            for item in payload.get("records", []):
+                key = item.get("idempotency_key")
+                duplicates += key in self.server.published
+                self.server.published[key] = self.server.published.get(key, 0) + 1
+        self._send_json(200, {"accepted": len(payload.get("records", [])) - duplicates,
+                              "duplicates": duplicates})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, **config):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.config = dict(DEFAULT_CONFIG, **config)
+        self.rng = random.Random(self.config["seed"])
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.published = {}
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, route):
+        with self.lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def start(self):
+        """Запуск в фоновом потоке"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def add_config_arguments(parser):
+    """Параметры сервера в командной строке"""
+    for name, value in DEFAULT_CONFIG.items():
+        if isinstance(value, dict):
+            continue
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8000)
+    add_config_arguments(parser)
+    args = vars(parser.parse_args())
+    port = args.pop("port")
+
+    server = StubServer(port, **args)
+    print(f"🧪 Заглушка запущена: {server.base_url}")
+    print(f"   UNSPLASH_BASE={server.base_url} HF_API_BASE={server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
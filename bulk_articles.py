@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+import string
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ArticleSynthesizer:
+    """Массовая генерация шаблонных статей
+
+    Шаблоны один раз переводятся в %-формат с заранее известным порядком
+    полей, словари — в кортежи строк. Индексы для целой пачки статей
+    выбираются за один вызов генератора случайных чисел (NumPy, если он
+    установлен), после чего каждая статья собирается одной операцией %.
+    """
+
+    def __init__(self, templates, vocabulary):
+        self.fields = list(vocabulary)
+        self.tables = [tuple(str(value) for value in vocabulary[field]) for field in self.fields]
+        self.sizes = [len(table) for table in self.tables] + [len(templates)]
+        self.templates = [self._compile(template) for template in templates]
+
+    def _compile(self, template):
+        """Шаблон str.format → (строка %-формата, номера полей по порядку)"""
+        parts = []
+        positions = []
+        for literal, field, _, _ in string.Formatter().parse(template):
+            parts.append(literal.replace('%', '%%'))
+            if field is not None:
+                parts.append('%s')
+                positions.append(self.fields.index(field))
+        return ''.join(parts), tuple(positions)
+
+    def _draw(self, rng, count):
+        """Индексы словарей и шаблона для count статей сразу"""
+        if isinstance(rng, random.Random):
+            columns = [rng.choices(range(size), k=count) for size in self.sizes]
+            return zip(*columns)
+        return rng.integers(0, self.sizes, size=(count, len(self.sizes))).tolist()
+
+    def generate(self, count, seed=None, batch_size=10000, backend='auto'):
+        """Итератор из count статей; с одним seed и backend результат одинаков"""
+        if backend == 'numpy' or (backend == 'auto' and numpy is not None):
+            rng = numpy.random.default_rng(seed)
+        else:
+            rng = random.Random(seed)
+
+        tables = self.tables
+        templates = self.templates
+        while count > 0:
+            batch = min(batch_size, count)
+            count -= batch
+            for row in self._draw(rng, batch):
+                text, positions = templates[row[-1]]
+                yield text % tuple([tables[position][row[position]] for position in positions])
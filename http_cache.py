@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+import requests
+
+
+class HttpCache:
+    """Дисковый HTTP-кэш с ревалидацией по ETag/Last-Modified и LRU-вытеснением"""
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.environ.get('HTTP_CACHE_DIR', '.http_cache')
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('HTTP_CACHE_MAX_MB', '50')) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        """Чтение индекса кэша"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        """Атомарная запись индекса кэша"""
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _body_path(self, url):
+        """Путь к телу ответа для URL"""
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+    def _entry(self, url):
+        """Запись индекса, если тело ответа есть на диске"""
+        entry = self.index.get(url)
+        if entry and os.path.exists(self._body_path(url)):
+            return entry
+        return None
+
+    @staticmethod
+    def _max_age(response):
+        """Срок свежести из Cache-Control"""
+        match = re.search(r'max-age=(\d+)', response.headers.get('Cache-Control', ''))
+        return int(match.group(1)) if match else 0
+
+    def _serve(self, url, dest, source):
+        """Копирование тела из кэша и отметка об использовании"""
+        shutil.copyfile(self._body_path(url), dest)
+        with self._lock:
+            self.index[url]['accessed'] = time.time()
+            self._save_index()
+        return source
+
+    def fetch(self, session, url, dest, timeout=15, cancelled=None):
+        """Загрузка URL в файл dest через кэш
+
+        Возвращает источник: "fresh", "revalidated", "network", "offline"
+        или None, если загрузку прервали через cancelled.
+        """
+        entry = self._entry(url)
+        if entry and entry.get('expires', 0) > time.time():
+            return self._serve(url, dest, 'fresh')
+
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        body_path = self._body_path(url)
+        part_path = f"{body_path}.{threading.get_ident()}.part"
+
+        try:
+            with session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+                if response.status_code == 304 and entry:
+                    with self._lock:
+                        entry['expires'] = time.time() + self._max_age(response)
+                    return self._serve(url, dest, 'revalidated')
+
+                response.raise_for_status()
+                size = 0
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        if cancelled is not None and cancelled.is_set():
+                            return None
+                        f.write(chunk)
+                        size += len(chunk)
+
+                with self._lock:
+                    os.replace(part_path, body_path)
+                    self.index[url] = {
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'expires': time.time() + self._max_age(response),
+                        'size': size,
+                        'accessed': time.time()
+                    }
+                    self._evict()
+                    self._save_index()
+
+        except requests.RequestException:
+            # Нет сети или сервер ответил ошибкой: отдаём то, что есть
+            if entry:
+                print(f"📴 Сеть недоступна, используем кэш: {url}")
+                return self._serve(url, dest, 'offline')
+            raise
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+        shutil.copyfile(body_path, dest)
+        return 'network'
+
+    def _evict(self):
+        """Вытеснение давно не использованных записей сверх лимита"""
+        total = sum(entry['size'] for entry in self.index.values())
+        for url, entry in sorted(self.index.items(), key=lambda item: item[1]['accessed']):
+            if total <= self.max_bytes or len(self.index) == 1:
+                break
+            total -= entry['size']
+            del self.index[url]
+            body_path = self._body_path(url)
+            if os.path.exists(body_path):
+                os.remove(body_path)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import time
+import uuid
+
+# Пауза перед повторным опросом, если сервис не сообщил estimated_time, и её предел
+DEFAULT_ESTIMATED_TIME = 20.0
+MAX_DELAY = 600.0
+# Окно в конце запуска, в котором ждём загрузки модели, и предел одного повторного запроса
+POLL_WINDOW = 90.0
+POLL_TIMEOUT = 30.0
+
+
+class ImageJobs:
+    """Отложенные задания Stable Diffusion
+
+    Пока модель загружается (ответ 503 с estimated_time), статья публикуется
+    с временным изображением, а запрос повторяется не раньше estimated_time.
+    В конце запуска задания опрашиваются в коротком окне (window секунд,
+    не дольше общего срока): модель обычно успевает загрузиться за
+    estimated_time. Не успевшие задания остаются в image_jobs.json, но их
+    повтор в следующем запуске — лишь попытка: к тому времени модель, скорее
+    всего, снова выгружена. Готовое изображение подставляется в архив (сайт
+    и очередь публикаций находят запись по ревизии) и tilda_data.json.
+    """
+
+    def __init__(self, artifacts, archive, path=None, max_attempts=8, metrics=None):
+        self.path = path or os.environ.get('IMAGE_JOBS', 'image_jobs.json')
+        self.artifacts = artifacts
+        self.archive = archive
+        self.max_attempts = max_attempts
+        self.metrics = metrics
+        self.jobs = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.jobs, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _count(self, outcome):
+        if self.metrics is not None:
+            self.metrics.inc("image_jobs_total", outcome=outcome)
+
+    def submit(self, url, payload, estimated_time=None):
+        """Новое задание; первый повтор — через estimated_time секунд"""
+        job = {
+            "id": uuid.uuid4().hex,
+            "url": url,
+            "payload": payload,
+            "attempts": 0,
+            "next_poll": time.time() + min(MAX_DELAY, estimated_time or DEFAULT_ESTIMATED_TIME),
+            "article_id": None,
+            "provisional": None
+        }
+        self.jobs.append(job)
+        self._save()
+        self._count("submitted")
+        return job
+
+    def attach(self, job, article_id, provisional):
+        """Статья, в которую подставить готовое изображение вместо provisional"""
+        job["article_id"] = article_id
+        job["provisional"] = provisional
+        self._save()
+
+    def _swap(self, job, image_path):
+        """Замена временного изображения в архиве и, если статья последняя, в tilda_data.json"""
+        if job["article_id"] is None:
+            return
+        record = self.archive.replace_image(job["article_id"], image_path)
+        if record is not None and self.archive.last_id() == job["article_id"]:
+            tmp_path = 'tilda_data.json.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, 'tilda_data.json')
+        print(f"🔁 Изображение статьи {job['article_id']} заменено: {job['provisional']} → {image_path}")
+
+    def _poll_job(self, job, session, headers, timeout):
+        """Один повторный запрос; True, если задание завершено"""
+        job["attempts"] += 1
+        try:
+            response = session.post(job["url"], headers=headers, json=job["payload"], timeout=timeout)
+        except Exception as e:
+            print(f"⚠️ Задание {job['id'][:8]}: {e}")
+            response = None
+
+        if response is not None and response.status_code == 200:
+            image_filename = f"article_image_{job['id'][:8]}.jpg"
+            with open(image_filename, 'wb') as f:
+                f.write(response.content)
+            self._swap(job, self.artifacts.put_file(image_filename))
+            self._count("completed")
+            return True
+
+        if job["attempts"] >= self.max_attempts:
+            print(f"❌ Задание {job['id'][:8]} снято после {job['attempts']} попыток")
+            self._count("dropped")
+            return True
+
+        # Модель ещё загружается: ждём столько, сколько она просит, иначе — экспоненциальная пауза
+        delay = DEFAULT_ESTIMATED_TIME * 2 ** (job["attempts"] - 1)
+        if response is not None and response.status_code == 503:
+            try:
+                delay = float(response.json().get("estimated_time") or delay)
+            except ValueError:
+                pass
+        job["next_poll"] = time.time() + min(MAX_DELAY, delay)
+        return False
+
+    def poll(self, session, headers, deadline, window=None):
+        """Опрос заданий в окне window секунд, но не дольше deadline; возвращает число незавершённых"""
+        if window is None:
+            window = float(os.environ.get('HF_IMAGE_JOB_WINDOW', POLL_WINDOW))
+        closes = time.time() + min(window, deadline.remaining())
+        while self.jobs:
+            job = min(self.jobs, key=lambda job: job["next_poll"])
+            remaining = closes - time.time()
+            if remaining < 1 or job["next_poll"] >= closes:
+                break
+            if job["next_poll"] > time.time():
+                time.sleep(max(0.0, job["next_poll"] - time.time()))
+                continue
+            if self._poll_job(job, session, headers, min(POLL_TIMEOUT, remaining)):
+                self.jobs.remove(job)
+            self._save()
+        self._save()
+        if self.jobs:
+            print(f"⏳ Отложенных изображений: {len(self.jobs)}, повторим при следующем запуске")
+        return len(self.jobs)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from artifact_store import ArtifactStore
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Ширины вариантов изображения для srcset
+SIZES = {"thumb": 320, "mobile": 640, "desktop": 1024}
+FORMATS = {"jpeg": ("jpg", {"quality": 82, "optimize": True, "progressive": True}),
+           "webp": ("webp", {"quality": 80, "method": 4})}
+
+
+def variant_paths(image_path, root=None):
+    """Пути вариантов изображения: {размер: {формат: путь}}"""
+    root = root or os.path.join(os.path.dirname(image_path), 'variants')
+    source_hash = os.path.splitext(os.path.basename(image_path))[0]
+    return {
+        size: {fmt: f"{root}/{source_hash}-{size}.{extension}" for fmt, (extension, _) in FORMATS.items()}
+        for size in SIZES
+    }
+
+
+def make_variants(image_path, root=None):
+    """Уменьшенные копии в JPEG и WebP; уже готовые варианты не пересоздаются
+
+    Выполняется в процессе пула, поэтому функция модульная и возвращает
+    только данные: {размер: {"width", "height", формат: путь}}.
+    """
+    paths = variant_paths(image_path, root)
+    variants = {}
+    # Image.open читает только заголовок; пиксели декодируются, если есть что создавать
+    with Image.open(image_path) as source:
+        if not all(os.path.exists(path) for formats in paths.values() for path in formats.values()):
+            source = source.convert("RGB")
+        for size, width in SIZES.items():
+            # Не увеличиваем: вариант не шире исходного изображения
+            scale = min(1.0, width / source.width)
+            dimensions = (round(source.width * scale), round(source.height * scale))
+            variants[size] = {"width": dimensions[0], "height": dimensions[1]}
+            resized = None
+            for fmt, (_, options) in FORMATS.items():
+                path = paths[size][fmt]
+                variants[size][fmt] = path
+                if os.path.exists(path):
+                    continue
+                if resized is None:
+                    resized = source.resize(dimensions, Image.LANCZOS) if scale < 1.0 else source
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                resized.save(path + '.tmp', format=fmt.upper(), **options)
+                os.replace(path + '.tmp', path)
+    return variants
+
+
+def srcset(variants, fmt):
+    """Строка srcset для формата"""
+    return ", ".join(f"{entry[fmt]} {entry['width']}w" for entry in variants.values())
+
+
+class ImageVariants:
+    """Создание вариантов изображений на пуле процессов
+
+    Без Pillow этап пропускается, и статьи ссылаются только на исходное изображение.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or int(os.environ.get('IMAGE_VARIANT_WORKERS', '2'))
+        self._pool = None
+
+    @property
+    def available(self):
+        return Image is not None
+
+    def submit(self, image_path):
+        """Запуск в пуле; future с вариантами или None, если делать нечего"""
+        if not self.available or not image_path or not os.path.exists(image_path):
+            return None
+        paths = variant_paths(image_path)
+        if all(os.path.exists(path) for formats in paths.values() for path in formats.values()):
+            # Для этого хэша варианты уже есть: размеры читаются из заголовка без пула
+            future = Future()
+            try:
+                future.set_result(make_variants(image_path))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool.submit(make_variants, image_path)
+
+    @staticmethod
+    def result(future):
+        """Варианты из future; ошибка (например, не JPEG) означает их отсутствие"""
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"⚠️ Варианты изображения не созданы: {e}")
+            return None
+
+    def create_all(self, image_paths):
+        """Варианты для набора изображений, параллельно"""
+        futures = [self.submit(path) for path in image_paths]
+        return {path: self.result(future) for path, future in zip(image_paths, futures)}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Варианты изображений для srcset")
+    parser.add_argument("--workers", type=int, default=None, help="процессов в пуле")
+    args = parser.parse_args()
+
+    variants = ImageVariants(args.workers)
+    if not variants.available:
+        print("❌ Нужен Pillow: pip install pillow")
+        return
+
+    results = variants.create_all(ArtifactStore().blobs())
+    variants.shutdown()
+    done = sum(1 for result in results.values() if result)
+    print(f"✅ Варианты готовы для {done} из {len(results)} изображений")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Границы корзин гистограмм Prometheus (секунды или байты — по смыслу метрики)
+BUCKETS = {
+    "seconds": [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120],
+    "bytes": [1024, 10240, 102400, 524288, 1048576, 5242880]
+}
+
+
+def series_key(name, labels):
+    """Ключ серии: имя метрики и отсортированные метки"""
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Metrics:
+    """Спаны, гистограммы и счётчики этапов генерации
+
+    Значения гистограмм копятся между запусками в окне последних window
+    замеров, поэтому p50/p95 в metrics.json отражают историю, а не один запуск.
+    """
+
+    def __init__(self, path=None, window=500):
+        self.path = path or os.environ.get('METRICS_PATH', 'metrics.json')
+        self.window = window
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Накопленные замеры прошлых запусков"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, series in previous.get("histograms", {}).items():
+            self.histograms[key] = dict(series, samples=series.get("samples", [])[-self.window:])
+        for key, series in previous.get("counters", {}).items():
+            self.counters[key] = series
+
+    def observe(self, name, value, unit="seconds", **labels):
+        """Замер в гистограмму"""
+        key = series_key(name, labels)
+        with self._lock:
+            series = self.histograms.setdefault(
+                key, {"name": name, "labels": labels, "unit": unit, "samples": []})
+            series["samples"].append(round(value, 6))
+            del series["samples"][:-self.window]
+
+    def inc(self, name, value=1, **labels):
+        """Увеличение счётчика"""
+        key = series_key(name, labels)
+        with self._lock:
+            series = self.counters.setdefault(key, {"name": name, "labels": labels, "value": 0})
+            series["value"] += value
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Замер длительности блока; ошибка попадает в метку outcome"""
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, outcome=outcome, **labels)
+
+    def summary(self):
+        """Сводка гистограмм: число замеров, p50, p95, максимум"""
+        with self._lock:
+            return {
+                key: {
+                    "count": len(series["samples"]),
+                    "p50": percentile(series["samples"], 0.5),
+                    "p95": percentile(series["samples"], 0.95),
+                    "max": max(series["samples"]),
+                    "unit": series["unit"]
+                }
+                for key, series in self.histograms.items() if series["samples"]
+            }
+
+    def write_json(self):
+        """Запись metrics.json рядом с tilda_data.json"""
+        data = {
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "summary": self.summary(),
+            "histograms": self.histograms,
+            "counters": self.counters
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def write_prometheus(self, path):
+        """Запись в текстовом формате Prometheus"""
+        lines = []
+        with self._lock:
+            for name in sorted({series["name"] for series in self.histograms.values()}):
+                lines.append(f"# TYPE {name} histogram")
+                for series in self.histograms.values():
+                    if series["name"] != name:
+                        continue
+                    samples = series["samples"]
+                    for bound in BUCKETS[series["unit"]]:
+                        count = sum(1 for value in samples if value <= bound)
+                        lines.append(f"{series_key(name + '_bucket', dict(series['labels'], le=bound))} {count}")
+                    lines.append(f"{series_key(name + '_bucket', dict(series['labels'], le='+Inf'))} {len(samples)}")
+                    lines.append(f"{series_key(name + '_sum', series['labels'])} {sum(samples)}")
+                    lines.append(f"{series_key(name + '_count', series['labels'])} {len(samples)}")
+
+            for name in sorted({series["name"] for series in self.counters.values()}):
+                lines.append(f"# TYPE {name} counter")
+                for series in self.counters.values():
+                    if series["name"] == name:
+                        lines.append(f"{series_key(name, series['labels'])} {series['value']}")
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+    def export(self):
+        """Запись metrics.json и, если задан METRICS_PROMETHEUS, файла Prometheus"""
+        self.write_json()
+        prometheus_path = os.environ.get('METRICS_PROMETHEUS')
+        if prometheus_path:
+            self.write_prometheus(prometheus_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сводка метрик генерации")
+    parser.add_argument("--path", default=None, help="файл metrics.json")
+    parser.add_argument("--markdown", action="store_true", help="таблица для GITHUB_STEP_SUMMARY")
+    args = parser.parse_args()
+
+    metrics = Metrics(args.path)
+    summary = metrics.summary()
+    if args.markdown:
+        print("| Метрика | Замеров | p50 | p95 | max |")
+        print("|---|---|---|---|---|")
+    for key, row in sorted(summary.items()):
+        unit = "с" if row["unit"] == "seconds" else "Б"
+        if args.markdown:
+            print(f"| `{key}` | {row['count']} | {row['p50']:.3f} {unit} | {row['p95']:.3f} {unit} | {row['max']:.3f} {unit} |")
+        else:
+            print(f"{key:<60} n={row['count']:<4} p50={row['p50']:.3f} p95={row['p95']:.3f} max={row['max']:.3f} {unit}")
+    for key, series in sorted(metrics.counters.items()):
+        if args.markdown:
+            print(f"| `{key}` | {series['value']} | | | |")
+        else:
+            print(f"{key:<60} {series['value']}")
+
+
+if __name__ == "__main__":
+    main()
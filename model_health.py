@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import threading
+import time
+
+# Ожидаемая задержка и доля успехов модели, о которой ещё ничего не известно
+DEFAULT_LATENCY = 10.0
+DEFAULT_SUCCESS = 0.5
+
+
+class ModelHealth:
+    """Автомат отключения моделей, сохраняемый между запусками
+
+    Для каждой модели хранятся EWMA задержки и доли успехов и число ошибок
+    подряд. После failure_threshold ошибок цепь размыкается (open) на
+    cooldown секунд, каждое следующее размыкание вдвое длиннее. По истечении
+    паузы модель получает одну пробную попытку (half_open): успех замыкает
+    цепь, ошибка размыкает снова.
+    """
+
+    def __init__(self, path=None, failure_threshold=3, cooldown=None, alpha=0.3):
+        self.path = path or os.environ.get('MODEL_HEALTH', 'model_health.json')
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown or float(os.environ.get('MODEL_HEALTH_COOLDOWN', '21600'))
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.models = json.load(f)
+        except (OSError, ValueError):
+            self.models = {}
+
+    def _entry(self, model):
+        return self.models.setdefault(model, {
+            "latency": DEFAULT_LATENCY,
+            "success": DEFAULT_SUCCESS,
+            "failures": 0,
+            "trips": 0,
+            "opened_at": None
+        })
+
+    def state(self, model, now=None):
+        """closed, open или half_open"""
+        entry = self.models.get(model)
+        if not entry or entry["opened_at"] is None:
+            return "closed"
+        pause = self.cooldown * 2 ** min(entry["trips"] - 1, 5)
+        if (now or time.time()) - entry["opened_at"] >= pause:
+            return "half_open"
+        return "open"
+
+    def expected_latency(self, model):
+        """Ожидаемое время до успешного ответа: задержка, делённая на долю успехов"""
+        entry = self.models.get(model) or {"latency": DEFAULT_LATENCY, "success": DEFAULT_SUCCESS}
+        return entry["latency"] / max(entry["success"], 0.05)
+
+    def order(self, models):
+        """Модели с замкнутой цепью по ожидаемой задержке, затем пробные; разомкнутые пропускаются"""
+        with self._lock:
+            now = time.time()
+            states = {model: self.state(model, now) for model in models}
+        for model, state in states.items():
+            if state == "open":
+                print(f"🚫 Модель {model} отключена после ошибок, пропускаем")
+        closed = sorted((m for m in models if states[m] == "closed"), key=self.expected_latency)
+        probes = [m for m in models if states[m] == "half_open"]
+        return closed + probes
+
+    def record(self, model, ok, latency):
+        """Результат запроса к модели"""
+        with self._lock:
+            entry = self._entry(model)
+            entry["success"] += self.alpha * ((1.0 if ok else 0.0) - entry["success"])
+            if ok:
+                entry["latency"] += self.alpha * (latency - entry["latency"])
+                entry["failures"] = 0
+                entry["trips"] = 0
+                entry["opened_at"] = None
+                return
+
+            entry["failures"] += 1
+            half_open = self.state(model) == "half_open"
+            if half_open or (entry["opened_at"] is None and entry["failures"] >= self.failure_threshold):
+                entry["trips"] += 1
+                entry["opened_at"] = time.time()
+
+    def record_cut_off(self, model, latency):
+        """Запрос прерван не моделью (наш срок или победа другой модели): ответ не быстрее latency
+
+        Ошибкой это не считается; оценка задержки растёт, если latency больше неё.
+        """
+        with self._lock:
+            entry = self._entry(model)
+            if latency > entry["latency"]:
+                entry["latency"] += self.alpha * (latency - entry["latency"])
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.models, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Состояние моделей Hugging Face")
+    parser.add_argument("--path", default=None, help="файл model_health.json")
+    parser.add_argument("--reset", metavar="MODEL", help="замкнуть цепь модели")
+    args = parser.parse_args()
+
+    health = ModelHealth(args.path)
+    if args.reset:
+        health.models.pop(args.reset, None)
+        health.save()
+
+    for model, entry in sorted(health.models.items(), key=lambda item: health.expected_latency(item[0])):
+        print(f"{model:<45} {health.state(model):<9} задержка {entry['latency']:.2f} с, "
+              f"успехов {entry['success']:.0%}, ошибок подряд {entry['failures']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,16 @@ import datetime
 import os
 import json
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from artifact_store import ArtifactStore
+from article_archive import ArticleArchive
+from ngram_model import NgramModel
+from similarity_index import SimilarityIndex
+from providers import Deadline, Provider, ProviderChain, cached_default_image, generation_budget
+
+UNSPLASH_BASE = os.environ.get('UNSPLASH_BASE', 'https://images.unsplash.com')
 
 class ContentGenerator:
     def __init__(self):
@@ -35,26 +45,44 @@ class ContentGenerator:
         ]
         
         self.image_urls = [
-            "https://images.unsplash.com/photo-1677442135135-416f8aa26a5b?w=1024&h=512&fit=crop",
-            "https://images.unsplash.com/photo-1573164713714-d95e436ab8d6?w=1024&h=512&fit=crop",
-            "https://images.unsplash.com/photo-1535223289827-42f1e9919769?w=1024&h=512&fit=crop",
-            "https://images.unsplash.com/photo-1620712943543-bcc4688e7485?w=1024&h=512&fit=crop"
+            f"{UNSPLASH_BASE}/photo-1677442135135-416f8aa26a5b?w=1024&h=512&fit=crop",
+            f"{UNSPLASH_BASE}/photo-1573164713714-d95e436ab8d6?w=1024&h=512&fit=crop",
+            f"{UNSPLASH_BASE}/photo-1535223289827-42f1e9919769?w=1024&h=512&fit=crop",
+            f"{UNSPLASH_BASE}/photo-1620712943543-bcc4688e7485?w=1024&h=512&fit=crop"
         ]
+        self.stage_timings = {}
+        # Офлайн-модель, обученная на архиве статей (python ngram_model.py build)
+        self.ngram_model = NgramModel.load()
+        self.artifacts = ArtifactStore()
+        self.archive = ArticleArchive()
+        self.similarity = SimilarityIndex()
+        
+        # Источники по порядку предпочтения, общий бюджет на запуск
+        self.budget = generation_budget()
+        self.text_chain = ProviderChain("text", [
+            Provider("templates", lambda timeout: self.generate_article(), instant=True)
+        ])
+        self.image_chain = ProviderChain("image", [
+            Provider("unsplash", self.download_image),
+            Provider("cached_default", lambda timeout: cached_default_image(self.artifacts), instant=True)
+        ])
 
     def generate_article(self):
         """Генерация статьи локально"""
         print("🔄 Генерация статьи...")
-        article = random.choice(self.article_templates)
+        article = self.ngram_model.generate(random) if self.ngram_model is not None else None
+        if not article:
+            article = random.choice(self.article_templates)
         print("✅ Статья сгенерирована")
         return article
 
-    def download_image(self):
+    def download_image(self, timeout=30):
         """Скачивание изображения с Unsplash"""
         print("🔄 Загрузка изображения...")
         
         try:
             image_url = random.choice(self.image_urls)
-            response = requests.get(image_url, timeout=30)
+            response = requests.get(image_url, timeout=min(30, timeout))
             response.raise_for_status()
             
             timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -64,7 +92,7 @@ class ContentGenerator:
                 f.write(response.content)
             
             print("✅ Изображение загружено")
-            return image_filename
+            return self.artifacts.put_file(image_filename)
             
         except Exception as e:
             print(f"❌ Ошибка загрузки изображения: {e}")
@@ -91,22 +119,59 @@ class ContentGenerator:
         with open('article.txt', 'w', encoding='utf-8') as f:
             f.write(article_text)
         
+        # Добавляем в архив статей
+        self.archive.append(tilda_data)
+        
         return tilda_data
 
+    def _timed(self, stage, func, *args):
+        """Выполнение этапа с замером времени"""
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.stage_timings[stage] = round(time.perf_counter() - started, 3)
+
+    def _run_stages(self):
+        """Параллельный запуск генерации текста и изображения в общем бюджете времени"""
+        self.stage_timings = {}
+        started = time.perf_counter()
+        deadline = Deadline(self.budget)
+        # Десятая часть бюджета остаётся на отсев дубликатов и запись для Tilda
+        stage_deadline = deadline.reserve(self.budget * 0.1)
+        
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            article_future = pool.submit(self._timed, "article", self.text_chain.run, stage_deadline)
+            image_future = pool.submit(self._timed, "image", self.image_chain.run, stage_deadline)
+            article_text = article_future.result()
+            print(f"📄 Длина статьи: {len(article_text)} символов")
+            image_path = image_future.result()
+        
+        # Отсев почти-дубликатов уже опубликованных статей
+        article_text = self._timed("similarity", self.similarity.admit,
+                                   article_text, lambda: self.text_chain.run(deadline))
+        
+        tilda_data = self._timed("tilda", self.prepare_for_tilda, article_text, image_path)
+        self.stage_timings["total"] = round(time.perf_counter() - started, 3)
+        self.show_timings()
+        return tilda_data
+
+    def show_timings(self):
+        """Показать время этапов и выигрыш от параллельности"""
+        t = self.stage_timings
+        sequential = t["article"] + t["image"]
+        overlapped = max(t["article"], t["image"])
+        print(f"⏱️ Этапы: статья {t['article']:.2f} с, изображение {t['image']:.2f} с, "
+              f"Tilda {t['tilda']:.2f} с, всего {t['total']:.2f} с")
+        print(f"⚡ Экономия за счёт параллельности: {sequential - overlapped:.2f} с")
+
     def generate_content(self):
         """Основная функция генерации контента"""
         print("🚀 Запуск генерации контента...")
         
         try:
-            # Генерируем статью
-            article_text = self.generate_article()
-            print(f"📄 Длина статьи: {len(article_text)} символов")
-            
-            # Загружаем изображение
-            image_path = self.download_image()
-            
-            # Подготавливаем для Tilda
-            tilda_data = self.prepare_for_tilda(article_text, image_path)
+            # Статья и изображение готовятся параллельно, затем данные для Tilda
+            tilda_data = self._run_stages()
             
             print("✅ Генерация завершена!")
             return tilda_data
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""HTTP API последних статей из памяти для встраивания в Tilda
+
+Маршруты: /latest.json — последняя статья, /articles.json — последние N,
+/article.txt — текст последней статьи, /images/<sha256>.jpg — их изображения
+и /images/variants/... — уменьшенные копии из image_variants.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from article_archive import ArticleArchive
+
+
+class Resource:
+    """Готовый ответ: тело, его gzip-вариант и сильные ETag для каждого"""
+
+    def __init__(self, body, content_type, compress=True):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0) if compress else None
+        self.gzip_etag = self.etag[:-1] + '-gzip"'
+
+
+def build_resources(records, image_root='.'):
+    """Все ответы для записей records (новые первыми)"""
+    resources = {
+        "/articles.json": Resource(json.dumps(records, ensure_ascii=False).encode('utf-8'),
+                                   "application/json; charset=utf-8")
+    }
+    if records:
+        latest = records[0]
+        resources["/latest.json"] = Resource(json.dumps(latest, ensure_ascii=False).encode('utf-8'),
+                                             "application/json; charset=utf-8")
+        resources["/article.txt"] = Resource(latest.get("content", "").encode('utf-8'),
+                                             "text/plain; charset=utf-8")
+
+    for record in records:
+        # Исходное изображение и его уменьшенные копии для srcset
+        image_paths = [record.get("image_path")]
+        for formats in record.get("image_variants", {}).values():
+            image_paths += [formats.get("jpeg"), formats.get("webp")]
+
+        for image_path in image_paths:
+            if not image_path or "/" + image_path in resources:
+                continue
+            try:
+                with open(os.path.join(image_root, image_path), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                continue
+            content_type = mimetypes.guess_type(image_path)[0] or "application/octet-stream"
+            resources["/" + image_path] = Resource(body, content_type, compress=False)
+    return resources
+
+
+class NewsApi:
+    """Последние limit статей архива и их изображения в памяти
+
+    refresh() перечитывает архив и, если записи изменились (новая статья или
+    подставленное изображение), собирает новый набор ответов и подменяет его
+    одним присваиванием, так что запросы видят либо старый набор, либо новый.
+    """
+
+    def __init__(self, limit=10, archive_path=None, image_root='.'):
+        self.limit = limit
+        self.archive_path = archive_path
+        self.image_root = image_root
+        self.resources = {}
+        self.version = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Подмена ответов, если архив изменился; True при подмене"""
+        with self._lock:
+            with ArticleArchive(self.archive_path) as archive:
+                records = archive.latest(self.limit)
+            version = hashlib.sha256(json.dumps(records, sort_keys=True).encode('utf-8')).hexdigest()
+            if version == self.version:
+                return False
+            self.resources = build_resources(records, self.image_root)
+            self.version = version
+            return True
+
+    def watch(self, interval, stop):
+        """Периодическая проверка архива до установки stop"""
+        while not stop.wait(interval):
+            try:
+                if self.refresh():
+                    print("🔄 API: опубликована новая версия статей")
+            except Exception as e:
+                print(f"⚠️ API: не удалось обновить статьи: {e}")
+
+    def serve(self, host='127.0.0.1', port=8080):
+        """Запуск сервера в фоновом потоке"""
+        self.refresh()
+        server = ThreadingHTTPServer((host, port), ApiHandler)
+        server.daemon_threads = True
+        server.api = self
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"🌐 API статей: http://{host}:{server.server_address[1]}/latest.json")
+        return server
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "NewsApi/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _matches(self, etag):
+        """If-None-Match со списком сильных ETag или *"""
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return False
+        tags = [tag.strip() for tag in header.split(",")]
+        return "*" in tags or etag in tags
+
+    def _respond(self, send_body):
+        resource = self.server.api.resources.get(self.path.split("?")[0])
+        if resource is None:
+            body = b'{"error": "not found"}'
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+            return
+
+        use_gzip = resource.gzip_body is not None and "gzip" in self.headers.get("Accept-Encoding", "")
+        body, etag = (resource.gzip_body, resource.gzip_etag) if use_gzip else (resource.body, resource.etag)
+        not_modified = self._matches(etag)
+
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if not_modified:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_header("Content-Type", resource.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        self._respond(False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get('NEWS_API_PORT', '8080')))
+    parser.add_argument("-n", "--limit", type=int, default=10, help="сколько последних статей держать в памяти")
+    parser.add_argument("--poll", type=float, default=2.0, help="период проверки архива, секунды")
+    args = parser.parse_args()
+
+    api = NewsApi(args.limit)
+    api.serve(args.host, args.port)
+    try:
+        api.watch(args.poll, threading.Event())
+    except KeyboardInterrupt:
+        print("\n👋 API остановлен")
+
+
+if __name__ == "__main__":
+    main()
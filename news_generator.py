@@ -2,17 +2,80 @@
 # -*- coding: utf-8 -*-
 
 import requests
+import argparse
 import datetime
 import os
 import json
+import queue
 import random
+import signal
+import time
+import sys
+import threading
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+from http_cache import HttpCache
+from artifact_store import ArtifactStore
+from article_archive import ArticleArchive
+from uniqueness_index import UniquenessIndex
+from bulk_articles import ArticleSynthesizer
+from similarity_index import SimilarityIndex
+from metrics import Metrics
+from providers import Deadline, Provider, ProviderChain, cached_default_image, generation_budget
+from site_builder import SiteBuilder
+from news_api import NewsApi
+from image_variants import ImageVariants, srcset
+from profiling import Profiler, add_profile_arguments
+
+UNSPLASH_BASE = os.environ.get('UNSPLASH_BASE', 'https://images.unsplash.com')
 
 class ContentGenerator:
-    def __init__(self):
+    def __init__(self, seed=None, profiler=None):
+        # Собственный генератор случайных чисел: с seed запуск воспроизводим
+        self.rng = random.Random(seed)
+        # Этап изображения идёт в своём потоке, у него отдельный поток чисел
+        self.image_rng = random.Random(self.rng.getrandbits(64))
         self.article_templates = self._load_article_templates()
         self.image_urls = self._load_image_urls()
+        self.vocabulary = self._load_vocabulary()
+        self.uniqueness = UniquenessIndex(
+            [len(values) for values in self.vocabulary.values()] + [len(self.article_templates)]
+        )
+        self.synthesizer = None
+        self.stage_timings = {}
+        self.profiler = profiler
+        
+        # Общий пул соединений для всех загрузок
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.http_cache = HttpCache()
+        self.artifacts = ArtifactStore()
+        self.archive = ArticleArchive()
+        self.similarity = SimilarityIndex()
+        self.metrics = Metrics()
+        self.image_variants = ImageVariants()
+        
+        # Задержки ответа изображений для расчёта порога дублирующего запроса
+        self.image_latencies = deque(maxlen=50)
+        self.hedge_percentile = 0.9
+        self._rename_lock = threading.Lock()
         
-    def _load_article_templates(self):
+        # Источники по порядку предпочтения, общий бюджет на запуск
+        self.budget = generation_budget()
+        self.text_chain = ProviderChain("text", [
+            Provider("templates", lambda timeout: self.generate_article(), instant=True)
+        ], self.metrics)
+        self.image_chain = ProviderChain("image", [
+            Provider("unsplash", self.generate_image),
+            Provider("cached_default", lambda timeout: cached_default_image(self.artifacts), instant=True)
+        ], self.metrics)
+        
+    @staticmethod
+    def _load_article_templates():
         """Загрузка разнообразных шаблонов статей"""
         return [
             """{company} {achievement} {technology}. Новое решение демонстрирует беспрецедентные результаты в {application}, 
@@ -49,25 +112,24 @@ class ContentGenerator:
         """Список гарантированно работающих изображений"""
         return [
             # Технологии и AI
-            "https://images.unsplash.com/photo-1677442136019-21780ecad995?w=1024&h=512&fit=crop&auto=format",
-            "https://images.unsplash.com/photo-1573164713714-d95e436ab8d6?w=1024&h=512&fit=crop&auto=format",
-            "https://images.unsplash.com/photo-1535223289827-42f1e9919769?w=1024&h=512&fit=crop&auto=format",
+            f"{UNSPLASH_BASE}/photo-1677442136019-21780ecad995?w=1024&h=512&fit=crop&auto=format",
+            f"{UNSPLASH_BASE}/photo-1573164713714-d95e436ab8d6?w=1024&h=512&fit=crop&auto=format",
+            f"{UNSPLASH_BASE}/photo-1535223289827-42f1e9919769?w=1024&h=512&fit=crop&auto=format",
             
             # Нейросети и данные
-            "https://images.unsplash.com/photo-1620712943543-bcc4688e7485?w=1024&h=512&fit=crop&auto=format",
-            "https://images.unsplash.com/photo-1542831371-29b0f74f9713?w=1024&h=512&fit=crop&auto=format",
-            "https://images.unsplash.com/photo-1546054454-aa26e2b734c7?w=1024&h=512&fit=crop&auto=format",
+            f"{UNSPLASH_BASE}/photo-1620712943543-bcc4688e7485?w=1024&h=512&fit=crop&auto=format",
+            f"{UNSPLASH_BASE}/photo-1542831371-29b0f74f9713?w=1024&h=512&fit=crop&auto=format",
+            f"{UNSPLASH_BASE}/photo-1546054454-aa26e2b734c7?w=1024&h=512&fit=crop&auto=format",
             
             # Футуристические
-            "https://images.unsplash.com/photo-1555949963-aa79dcee981c?w=1024&h=512&fit=crop&auto=format",
-            "https://images.unsplash.com/photo-1563207153-f403bf289096?w=1024&h=512&fit=crop&auto=format",
-            "https://images.unsplash.com/photo-1579829366248-204fe8413f31?w=1024&h=512&fit=crop&auto=format"
+            f"{UNSPLASH_BASE}/photo-1555949963-aa79dcee981c?w=1024&h=512&fit=crop&auto=format",
+            f"{UNSPLASH_BASE}/photo-1563207153-f403bf289096?w=1024&h=512&fit=crop&auto=format",
+            f"{UNSPLASH_BASE}/photo-1579829366248-204fe8413f31?w=1024&h=512&fit=crop&auto=format"
         ]
 
-    def generate_article(self):
-        """Генерация уникальной статьи"""
-        print("🔄 Создание уникальной статьи...")
-        
+    @staticmethod
+    def _load_vocabulary():
+        """Словари для заполнения шаблонов"""
         companies = [
             "OpenAI", "Google DeepMind", "Microsoft Research", "Meta AI", "NVIDIA",
             "Anthropic", "Hugging Face", "Stability AI", "Tesla AI", "Amazon AI",
@@ -96,58 +158,171 @@ class ContentGenerator:
             "улучшили энергоэффективность систем"
         ]
         
-        # Случайный выбор элементов
-        company = random.choice(companies)
-        technology = random.choice(technologies)
-        application = random.choice(applications)
-        achievement = random.choice(achievements)
-        improvement = random.randint(30, 65)
-        template = random.choice(self.article_templates)
+        return {
+            "company": companies,
+            "technology": technologies,
+            "application": applications,
+            "achievement": achievements,
+            "improvement": list(range(30, 66))
+        }
+
+    def generate_article(self):
+        """Генерация уникальной статьи"""
+        print("🔄 Создание уникальной статьи...")
+        
+        # Случайная ещё не использованная комбинация элементов и шаблона
+        combination = self.uniqueness.draw(self.rng)
+        if combination is None:
+            print("⚠️ Все комбинации уже использованы, возможны повторы")
+            combination = tuple(self.rng.randrange(size) for size in self.uniqueness.dimensions)
+            self.metrics.inc("article_source_total", source="template", fallback="repeat")
+        else:
+            print(f"🎲 Осталось уникальных комбинаций: {self.uniqueness.remaining()}")
+            self.metrics.inc("article_source_total", source="template", fallback="none")
+        
+        *indices, template_index = combination
+        values = {
+            field: self.vocabulary[field][index]
+            for field, index in zip(self.vocabulary, indices)
+        }
         
         # Заполнение шаблона
-        article = template.format(
-            company=company,
-            technology=technology,
-            application=application,
-            achievement=achievement,
-            improvement=improvement
-        )
+        article = self.article_templates[template_index].format(**values)
         
         print("✅ Статья успешно создана")
         return article
 
-    def generate_image(self):
-        """Генерация изображения с гарантией"""
+    def generate_articles(self, n, seed=None, batch_size=10000):
+        """Массовая генерация n статей без учёта уникальности (для нагрузочных тестов)"""
+        if self.synthesizer is None:
+            self.synthesizer = ArticleSynthesizer(self.article_templates, self.vocabulary)
+        return self.synthesizer.generate(n, seed, batch_size)
+
+    def _hedge_delay(self):
+        """Порог ожидания перед дублирующим запросом (перцентиль задержек)"""
+        if not self.image_latencies:
+            return 1.5
+        ordered = sorted(self.image_latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile))
+        return min(5.0, max(0.3, ordered[index]))
+
+    def _fetch_image(self, image_url, image_filename, finished, timeout=15):
+        """Загрузка изображения через HTTP-кэш во временный файл"""
+        started = time.perf_counter()
+        part_filename = f"{image_filename}.{threading.get_ident()}.part"
+        
+        try:
+            try:
+                source = self.http_cache.fetch(self.session, image_url, part_filename,
+                                               timeout=timeout, cancelled=finished)
+            except Exception:
+                self.metrics.observe("http_request_seconds", time.perf_counter() - started,
+                                     target="unsplash", outcome="error")
+                raise
+            
+            elapsed = time.perf_counter() - started
+            self.metrics.observe("http_request_seconds", elapsed,
+                                 target="unsplash", outcome=source or "cancelled")
+            if source is None:
+                return None  # Другой запрос уже победил
+            if source in ("network", "revalidated"):
+                self.image_latencies.append(elapsed)
+            if source == "network":
+                self.metrics.inc("http_downloaded_bytes_total", os.path.getsize(part_filename), target="unsplash")
+            
+            with self._rename_lock:
+                if finished.is_set():
+                    return None
+                os.replace(part_filename, image_filename)
+                finished.set()
+            print(f"💾 Источник изображения: {source}")
+            return image_filename
+            
+        finally:
+            if os.path.exists(part_filename):
+                os.remove(part_filename)
+
+    def _hedged_download(self, image_urls, image_filename, timeout=15):
+        """Загрузка с дублированием медленного запроса на второй URL
+        
+        Запросы идут в фоновых потоках: проигравший, который ещё ждёт первого
+        байта, не задерживает выход из процесса.
+        """
+        finished = threading.Event()
+        results = queue.Queue()
+        fetch_image = self._worker(self._fetch_image)
+        
+        def fetch(image_url, timeout):
+            try:
+                results.put((fetch_image(image_url, image_filename, finished, timeout), None))
+            except Exception as e:
+                results.put((None, e))
+        
+        threading.Thread(target=fetch, args=(image_urls[0], timeout), daemon=True).start()
+        pending = 1
+        
+        hedge_delay = self._hedge_delay()
+        hedge_at = time.monotonic() + hedge_delay
+        # Дублирующий запрос получает только остаток таймаута первого
+        hedged = len(image_urls) < 2 or timeout <= hedge_delay
+        
+        error = None
+        try:
+            while pending:
+                try:
+                    result, e = results.get(timeout=None if hedged else max(0.0, hedge_at - time.monotonic()))
+                except queue.Empty:
+                    print(f"⏳ Нет ответа за {hedge_delay:.2f} с, параллельно запрашиваем: {image_urls[1]}")
+                    self.metrics.inc("image_hedged_requests_total")
+                    threading.Thread(target=fetch, args=(image_urls[1], timeout - hedge_delay), daemon=True).start()
+                    pending += 1
+                    hedged = True
+                    continue
+                pending -= 1
+                if e is not None:
+                    error = e
+                    continue
+                if result:
+                    return result
+        finally:
+            finished.set()
+        
+        raise error or RuntimeError("изображение не загружено")
+
+    def generate_image(self, timeout=None):
+        """Загрузка изображения с Unsplash, попытки укладываются в timeout"""
         print("🔄 Загрузка изображения...")
+        deadline = Deadline(timeout or self.budget)
         
         max_retries = 3
         for attempt in range(max_retries):
+            if deadline.expired():
+                print("⏰ Время на загрузку изображения истекло")
+                return None
             try:
-                image_url = random.choice(self.image_urls)
-                print(f"📡 Попытка {attempt + 1}: {image_url}")
-                
-                response = requests.get(image_url, timeout=15)
-                response.raise_for_status()
+                image_urls = self.image_rng.sample(self.image_urls, 2)
+                print(f"📡 Попытка {attempt + 1}: {image_urls[0]}")
                 
                 timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
                 image_filename = f"article_image_{timestamp}.jpg"
                 
-                with open(image_filename, 'wb') as f:
-                    f.write(response.content)
+                self._hedged_download(image_urls, image_filename, min(15, deadline.remaining()))
+                image_path = self.artifacts.put_file(image_filename)
                 
-                print(f"✅ Изображение сохранено: {image_filename}")
-                return image_filename
+                print(f"✅ Изображение сохранено: {image_path}")
+                return image_path
                 
             except Exception as e:
                 print(f"⚠️ Попытка {attempt + 1} не удалась: {e}")
                 if attempt < max_retries - 1:
                     print("🔄 Пробуем другое изображение...")
+                    self.metrics.inc("image_retries_total")
                     continue
                 else:
                     print("❌ Все попытки загрузки изображения провалились")
                     return None
 
-    def prepare_for_tilda(self, article_text, image_path):
+    def prepare_for_tilda(self, article_text, image_path, image_variants=None):
         """Подготовка данных для Tilda"""
         print("📝 Подготовка данных для Tilda...")
         
@@ -168,17 +343,21 @@ class ContentGenerator:
         ]
         
         tilda_data = {
-            "title": random.choice(titles),
+            "title": self.rng.choice(titles),
             "date": datetime.datetime.now().strftime("%d.%m.%Y %H:%M"),
             "content": article_text,
             "image_path": image_path or "default_image.jpg",
             "short_description": article_text[:120] + "..." if len(article_text) > 120 else article_text,
-            "tags": random.choice(tags_options),
-            "views": random.randint(100, 2500),
-            "rating": round(random.uniform(4.2, 4.9), 1),
-            "read_time": random.randint(3, 8),
-            "author": random.choice(["AI Редактор", "Технологический обозреватель", "Эксперт по ИИ"])
+            "tags": self.rng.choice(tags_options),
+            "views": self.rng.randint(100, 2500),
+            "rating": round(self.rng.uniform(4.2, 4.9), 1),
+            "read_time": self.rng.randint(3, 8),
+            "author": self.rng.choice(["AI Редактор", "Технологический обозреватель", "Эксперт по ИИ"])
         }
+        if image_variants:
+            # Уменьшенные копии для srcset: {размер: {"width", "height", "jpeg", "webp"}}
+            tilda_data["image_variants"] = image_variants
+            tilda_data["image_srcset"] = {fmt: srcset(image_variants, fmt) for fmt in ("webp", "jpeg")}
         
         # Сохраняем данные
         with open('tilda_data.json', 'w', encoding='utf-8') as f:
@@ -187,26 +366,142 @@ class ContentGenerator:
         with open('article.txt', 'w', encoding='utf-8') as f:
             f.write(article_text)
         
+        # Добавляем в архив статей
+        self.archive.append(tilda_data)
+        
         return tilda_data
 
+    def _profile(self, stage):
+        """Профиль этапа в режиме --profile"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(stage)
+
+    def _worker(self, func):
+        """Функция для потока, запускаемого этапом: в режиме --profile её профиль идёт в этап"""
+        if self.profiler is None:
+            return func
+        return self.profiler.worker(func)
+
+    def _timed(self, stage, func, *args):
+        """Выполнение этапа с замером времени"""
+        started = time.perf_counter()
+        try:
+            with self.metrics.span("stage_seconds", stage=stage), self._profile(stage):
+                return func(*args)
+        finally:
+            self.stage_timings[stage] = round(time.perf_counter() - started, 3)
+
+    def _run_stages(self):
+        """Параллельный запуск генерации текста и изображения в общем бюджете времени"""
+        self.stage_timings = {}
+        started = time.perf_counter()
+        deadline = Deadline(self.budget)
+        # Десятая часть бюджета остаётся на отсев дубликатов и запись для Tilda
+        stage_deadline = deadline.reserve(self.budget * 0.1)
+        
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            article_future = pool.submit(self._timed, "article", self.text_chain.run, stage_deadline)
+            image_future = pool.submit(self._timed, "image", self.image_chain.run, stage_deadline)
+            article_text = article_future.result()
+            print(f"📄 Длина статьи: {len(article_text)} символов")
+            image_path = image_future.result()
+        
+        # Варианты изображения считаются в пуле процессов, пока идёт отсев дубликатов
+        variants_future = self.image_variants.submit(image_path)
+        
+        # Отсев почти-дубликатов уже опубликованных статей
+        article_text = self._timed("similarity", self.similarity.admit,
+                                   article_text, lambda: self.text_chain.run(deadline))
+        
+        image_variants = self._timed("variants", self.image_variants.result, variants_future)
+        tilda_data = self._timed("tilda", self.prepare_for_tilda, article_text, image_path, image_variants)
+        self.stage_timings["total"] = round(time.perf_counter() - started, 3)
+        self.metrics.observe("stage_seconds", self.stage_timings["total"], stage="total", outcome="ok")
+        self.metrics.export()
+        self.show_timings()
+        return tilda_data
+
+    def show_timings(self):
+        """Показать время этапов и выигрыш от параллельности"""
+        t = self.stage_timings
+        sequential = t["article"] + t["image"]
+        overlapped = max(t["article"], t["image"])
+        print(f"⏱️ Этапы: статья {t['article']:.2f} с, изображение {t['image']:.2f} с, "
+              f"Tilda {t['tilda']:.2f} с, всего {t['total']:.2f} с")
+        print(f"⚡ Экономия за счёт параллельности: {sequential - overlapped:.2f} с")
+
     def generate_content(self):
         """Основная функция генерации"""
         print("🚀 Запуск генерации контента...")
         print("=" * 60)
         
-        # Генерируем статью
-        article_text = self.generate_article()
-        print(f"📄 Длина статьи: {len(article_text)} символов")
-        
-        # Генерируем изображение
-        image_path = self.generate_image()
-        
-        # Подготавливаем данные
-        tilda_data = self.prepare_for_tilda(article_text, image_path)
+        # Статья и изображение готовятся параллельно, затем данные для Tilda
+        tilda_data = self._run_stages()
         
         print("✅ Генерация завершена успешно!")
         return tilda_data
 
+    def generate_batch(self, count, jsonl_path='articles.jsonl'):
+        """Пакетная генерация: каждая запись сразу дописывается в JSONL"""
+        print(f"📦 Пакетная генерация: {count} статей → {jsonl_path}")
+        
+        last = None
+        with open(jsonl_path, 'a', encoding='utf-8') as sink:
+            for index in range(count):
+                print(f"\n📰 Статья {index + 1}/{count}")
+                last = self.generate_content()
+                sink.write(json.dumps(last, ensure_ascii=False) + "\n")
+                sink.flush()
+        
+        print(f"✅ Пакет готов: {count} статей в {jsonl_path}")
+        return last
+
+    def run_daemon(self, interval, jitter=0.1, build_site=False, api=None):
+        """Генерация по расписанию в одном процессе до SIGTERM/SIGINT
+
+        Шаблоны, индексы, кэши и пул соединений остаются прогретыми между запусками.
+        Расписание отсчитывается от начала запуска, jitter — доля случайного разброса интервала.
+        """
+        stop = threading.Event()
+        
+        def request_stop(signum, frame):
+            print(f"\n🛑 Получен сигнал {signal.Signals(signum).name}, завершаем после текущей статьи...")
+            stop.set()
+        
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        
+        # Разброс интервала не должен сдвигать воспроизводимую последовательность self.rng
+        schedule_rng = random.Random()
+        site = SiteBuilder(archive=self.archive) if build_site else None
+        runs = 0
+        print(f"🔁 Режим демона: интервал {interval:.0f} с ± {jitter:.0%}")
+        
+        while not stop.is_set():
+            started = time.monotonic()
+            runs += 1
+            print(f"\n📰 Запуск {runs} ({datetime.datetime.now():%d.%m.%Y %H:%M:%S})")
+            try:
+                self.generate_content()
+                if site is not None:
+                    print(f"🏗️ Пересобрано страниц сайта: {len(site.build())}")
+                if api is not None:
+                    api.refresh()
+            except Exception as e:
+                # Демон переживает сбой отдельного запуска
+                print(f"❌ Запуск {runs} не удался: {e}")
+                self.metrics.inc("daemon_failed_runs_total")
+            
+            delay = interval * (1 + schedule_rng.uniform(-jitter, jitter))
+            wait = max(0.0, started + delay - time.monotonic())
+            print(f"💤 Следующий запуск через {wait:.0f} с")
+            stop.wait(wait)
+        
+        self.archive.close()
+        print(f"👋 Демон остановлен, статей за работу: {runs}")
+        return runs
+
     def show_results(self, result):
         """Показать результаты генерации"""
         print("\n" + "=" * 60)
@@ -229,16 +524,56 @@ class ContentGenerator:
         print(preview)
         print("=" * 40)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Генератор новостей AI")
+    parser.add_argument("--count", type=int, default=1,
+                        help="сколько статей сгенерировать за один запуск")
+    parser.add_argument("--jsonl", default="articles.jsonl",
+                        help="JSONL-файл для пакетного режима")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed генератора случайных чисел для воспроизводимого запуска")
+    parser.add_argument("--daemon", action="store_true",
+                        help="работать постоянно и генерировать статьи по расписанию")
+    parser.add_argument("--interval", type=float,
+                        default=float(os.environ.get('DAEMON_INTERVAL', '900')),
+                        help="интервал между статьями в режиме демона, секунды")
+    parser.add_argument("--jitter", type=float,
+                        default=float(os.environ.get('DAEMON_JITTER', '0.1')),
+                        help="случайный разброс интервала, доля от него")
+    parser.add_argument("--build-site", action="store_true",
+                        help="в режиме демона пересобирать сайт после каждой статьи")
+    parser.add_argument("--serve", type=int, metavar="PORT", default=None,
+                        help="в режиме демона отдавать последние статьи по HTTP (news_api.py)")
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    
     print("🤖 Умный генератор новостей AI")
     print("=" * 60)
     print("🎯 Гарантированная генерация контента")
     print("⚡ Быстро и надежно")
     print("=" * 60)
     
-    generator = ContentGenerator()
-    result = generator.generate_content()
+    profiler = Profiler.from_args(args)
+    with profiler.stage("init") if profiler else nullcontext():
+        generator = ContentGenerator(seed=args.seed, profiler=profiler)
+    if args.daemon:
+        api = None
+        if args.serve is not None:
+            api = NewsApi()
+            api.serve(port=args.serve)
+        generator.run_daemon(args.interval, args.jitter, args.build_site, api)
+        return
+    if args.count > 1:
+        result = generator.generate_batch(args.count, args.jsonl)
+    else:
+        result = generator.generate_content()
     generator.show_results(result)
+    
+    if profiler is not None and profiler.finish(__file__):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
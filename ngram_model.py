@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import time
+from array import array
+
+from article_archive import ArticleArchive
+
+MAGIC = b'NGRM1'
+HEADER = struct.Struct('<5s3xIIII')
+
+# Служебные токены: начало и конец статьи, граница абзацев
+BOS, EOS, PARAGRAPH = 0, 1, 2
+SPECIAL = ["<s>", "</s>", "\n\n"]
+
+TOKEN_RE = re.compile(r"\n\s*\n|[\w'-]+|[^\w\s]")
+NO_SPACE_BEFORE = set(".,!?:;)»%…")
+NO_SPACE_AFTER = set("(«")
+
+
+def tokenize(text):
+    """Слова, знаки препинания и границы абзацев"""
+    return ["\n\n" if token.startswith("\n") else token for token in TOKEN_RE.findall(text)]
+
+
+def detokenize(tokens):
+    """Сборка текста с пробелами по правилам пунктуации"""
+    parts = []
+    for token in tokens:
+        if token == "\n\n":
+            parts.append(token)
+        elif parts and parts[-1] != "\n\n" and token not in NO_SPACE_BEFORE \
+                and parts[-1][-1:] not in NO_SPACE_AFTER:
+            parts.append(" " + token)
+        else:
+            parts.append(token)
+    return "".join(parts)
+
+
+def train(texts, path=None):
+    """Обучение триграммной модели и запись в файл
+
+    Файл: заголовок, отсортированные ключи контекстов (пара номеров токенов
+    в uint64), смещения переходов каждого контекста, номера следующих
+    токенов с накопленными частотами и словарь токенов со смещениями.
+    """
+    path = path or os.environ.get('NGRAM_MODEL', 'ngram.bin')
+    texts = [text for text in texts if tokenize(text)]
+    if not texts:
+        # Модель без контекстов не может начать ни одной статьи
+        raise ValueError("корпус пуст, модель не записана")
+    vocabulary = {token: number for number, token in enumerate(SPECIAL)}
+    counts = {}
+
+    for text in texts:
+        ids = [BOS, BOS]
+        for token in tokenize(text):
+            ids.append(vocabulary.setdefault(token, len(vocabulary)))
+        ids.append(EOS)
+        for first, second, following in zip(ids, ids[1:], ids[2:]):
+            followers = counts.setdefault(first << 32 | second, {})
+            followers[following] = followers.get(following, 0) + 1
+
+    contexts, offsets = array('Q'), array('I', [0])
+    next_ids, cumulative = array('I'), array('I')
+    for key in sorted(counts):
+        total = 0
+        for following, count in sorted(counts[key].items()):
+            total += count
+            next_ids.append(following)
+            cumulative.append(total)
+        contexts.append(key)
+        offsets.append(len(next_ids))
+
+    tokens = sorted(vocabulary, key=vocabulary.get)
+    encoded = [token.encode('utf-8') for token in tokens]
+    token_offsets = array('I', [0])
+    for token in encoded:
+        token_offsets.append(token_offsets[-1] + len(token))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(tokens), token_offsets[-1], len(contexts), len(next_ids)))
+        for table in (contexts, offsets, next_ids, cumulative, token_offsets):
+            f.write(table.tobytes())
+        f.write(b"".join(encoded))
+    os.replace(tmp_path, path)
+    return len(tokens), len(contexts), len(next_ids)
+
+
+class NgramModel:
+    """Триграммная модель, читаемая через mmap без построения словарей
+
+    Все таблицы — срезы memoryview над файлом: загрузка не зависит от размера
+    корпуса, контекст ищется бинарным поиском, следующий токен — бинарным
+    поиском по накопленным частотам.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, vocab_size, vocab_bytes, context_count, transition_count = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: не файл n-граммной модели")
+        if context_count == 0:
+            raise ValueError(f"{path}: модель обучена на пустом корпусе")
+
+        position = HEADER.size
+
+        def table(code, length):
+            nonlocal position
+            size = array(code).itemsize * length
+            result = view[position:position + size].cast(code)
+            position += size
+            return result
+
+        self.contexts = table('Q', context_count)
+        self.offsets = table('I', context_count + 1)
+        self.next_ids = table('I', transition_count)
+        self.cumulative = table('I', transition_count)
+        self.token_offsets = table('I', vocab_size + 1)
+        self.token_bytes = view[position:position + vocab_bytes]
+
+    @classmethod
+    def load(cls, path=None):
+        """Модель из файла или None, если её ещё не обучили"""
+        path = path or os.environ.get('NGRAM_MODEL', 'ngram.bin')
+        try:
+            return cls(path)
+        except (OSError, ValueError):
+            return None
+
+    def token(self, number):
+        start, end = self.token_offsets[number], self.token_offsets[number + 1]
+        return bytes(self.token_bytes[start:end]).decode('utf-8')
+
+    def _next(self, first, second, rng):
+        """Случайный следующий токен с учётом частот"""
+        key = first << 32 | second
+        index = bisect.bisect_left(self.contexts, key)
+        if index == len(self.contexts) or self.contexts[index] != key:
+            return EOS
+        start, end = self.offsets[index], self.offsets[index + 1]
+        target = rng.random() * self.cumulative[end - 1]
+        return self.next_ids[bisect.bisect_right(self.cumulative, target, start, end - 1)]
+
+    def generate(self, rng, min_words=120, max_words=400, max_restarts=20):
+        """Статья из min_words..max_words слов, обрывается на конце предложения
+
+        Если корпус состоит из коротких статей, генерация начинается заново
+        не больше max_restarts раз, после чего статья может оказаться короче.
+        """
+        tokens = []
+        words = 0
+        restarts = 0
+        first, second = BOS, BOS
+        while True:
+            following = self._next(first, second, rng)
+            if following == EOS:
+                if words >= min_words or restarts >= max_restarts:
+                    break
+                restarts += 1
+                # Статья корпуса кончилась раньше: начинаем следующую с нового абзаца
+                if tokens:
+                    tokens.append("\n\n")
+                first, second = BOS, BOS
+                continue
+
+            token = self.token(following)
+            tokens.append(token)
+            if following != PARAGRAPH and token[0].isalnum():
+                words += 1
+            if words >= max_words and token in (".", "!", "?"):
+                break
+            first, second = second, following
+        return detokenize(tokens).strip()
+
+
+def corpus_texts(archive_path=None, jsonl_paths=()):
+    """Тексты статей архива и JSONL-файлов с полем content"""
+    with ArticleArchive(archive_path) as archive:
+        for _, record in archive.id_range(1, archive.last_id()):
+            yield record.get("content", "")
+    for jsonl_path in jsonl_paths:
+        with open(jsonl_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line).get("content", "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн n-граммная модель статей")
+    parser.add_argument("--model", default=None, help="файл модели (по умолчанию ngram.bin)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="обучить модель на архиве статей")
+    build_parser.add_argument("--jsonl", nargs="*", default=[], help="дополнительные JSONL-корпуса")
+    sample_parser = subparsers.add_parser("sample", help="сгенерировать статью")
+    sample_parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        texts = [text for text in corpus_texts(jsonl_paths=args.jsonl) if text]
+        try:
+            tokens, contexts, transitions = train(texts, args.model)
+        except ValueError as e:
+            print(f"⚠️ {e}")
+            return
+        print(f"✅ Модель обучена на {len(texts)} статьях за {time.perf_counter() - started:.2f} с: "
+              f"{tokens} токенов, {contexts} контекстов, {transitions} переходов")
+        return
+
+    started = time.perf_counter()
+    model = NgramModel.load(args.model)
+    if model is None:
+        print("❌ Модель не найдена, сначала: python ngram_model.py build")
+        return
+    print(f"⏱️ Загрузка модели: {(time.perf_counter() - started) * 1000:.2f} мс\n")
+    print(model.generate(random.Random(args.seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import cProfile
+import datetime
+import functools
+import json
+import os
+import pstats
+import re
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Импорт скрипта без запуска main(): имена с дефисом (update-news.py) не импортируются обычным import
+IMPORT_SCRIPT = (
+    "import importlib.util, sys; sys.path.insert(0, {root!r}); "
+    "spec = importlib.util.spec_from_file_location('profiled', {path!r}); "
+    "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+)
+
+
+def add_profile_arguments(parser):
+    """Параметры режима профилирования в командной строке"""
+    parser.add_argument("--profile", action="store_true",
+                        help="профилировать запуск: cProfile по этапам, tracemalloc, время импорта")
+    parser.add_argument("--profile-dir", default=os.environ.get('PROFILE_DIR', 'profile'),
+                        help="каталог отчётов профилирования")
+    parser.add_argument("--time-budget", type=float, default=_env_float('PROFILE_TIME_BUDGET'),
+                        help="допустимое время запуска, секунды; превышение — код выхода 1")
+    parser.add_argument("--memory-budget", type=float, default=_env_float('PROFILE_MEMORY_BUDGET'),
+                        help="допустимый пик памяти Python, МБ; превышение — код выхода 1")
+
+
+def _env_float(name):
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+
+def import_costs(script, limit=25):
+    """Стоимость импортов скрипта по -X importtime в отдельном интерпретаторе, микросекунды"""
+    path = os.path.abspath(script)
+    command = [sys.executable, "-X", "importtime", "-c",
+               IMPORT_SCRIPT.format(root=os.path.dirname(path), path=path)]
+    started = time.perf_counter()
+    completed = subprocess.run(command, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({"module": name, "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                            "top_level": len(indent) == 1})
+    return {
+        "interpreter_and_imports_seconds": round(elapsed, 4),
+        "total_us": sum(module["self_us"] for module in modules),
+        "top_cumulative": sorted((m for m in modules if m["top_level"]),
+                                 key=lambda m: m["cumulative_us"], reverse=True)[:limit],
+        "top_self": sorted(modules, key=lambda m: m["self_us"], reverse=True)[:limit]
+    }
+
+
+class Profiler:
+    """Профиль одного запуска генератора
+
+    Каждый этап профилируется своим cProfile (этапы идут в разных потоках).
+    cProfile видит только свой поток, поэтому функции, которые этап
+    запускает в других потоках, оборачиваются worker(): их профили
+    добавляются к этапу. Память отслеживается tracemalloc с момента
+    создания профилировщика.
+    Отчёт report.json и файлы .prof для pstats/snakeviz пишутся в out_dir.
+    """
+
+    def __init__(self, out_dir='profile', time_budget=None, memory_budget=None, top=20):
+        self.out_dir = out_dir
+        self.time_budget = time_budget
+        self.memory_budget = memory_budget
+        self.top = top
+        self.stages = {}
+        self.started = time.perf_counter()
+        self._current = threading.local()
+        self._lock = threading.Lock()
+        tracemalloc.start(10)
+
+    @classmethod
+    def from_args(cls, args):
+        """Профилировщик по параметрам add_profile_arguments или None"""
+        if not args.profile:
+            return None
+        return cls(args.profile_dir, args.time_budget, args.memory_budget)
+
+    def _entry(self, name):
+        return self.stages.setdefault(name, {"seconds": 0.0, "profiles": []})
+
+    @contextmanager
+    def stage(self, name):
+        """Профиль этапа; повторные запуски этапа складываются"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: одновременно может работать только один профилировщик
+            profile = None
+        previous = getattr(self._current, "stage", None)
+        self._current.stage = name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._current.stage = previous
+            if profile is not None:
+                profile.disable()
+            with self._lock:
+                entry = self._entry(name)
+                entry["seconds"] += elapsed
+                if profile is not None:
+                    entry["profiles"].append(profile)
+
+    def worker(self, func):
+        """Обёртка функции, которую этап текущего потока запускает в другом потоке
+
+        Профиль вызова добавляется к этапу, время этапа не меняется. Вызовы,
+        не завершившиеся к отчёту (проигравшие гонку), в него не попадают.
+        """
+        name = getattr(self._current, "stage", None)
+        if name is None:
+            return func
+
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                profile = None
+            previous = getattr(self._current, "stage", None)
+            self._current.stage = name
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._current.stage = previous
+                if profile is not None:
+                    profile.disable()
+                    with self._lock:
+                        self._entry(name)["profiles"].append(profile)
+
+        return profiled
+
+    def _stage_report(self, name, entry):
+        report = {"seconds": round(entry["seconds"], 4)}
+        if not entry["profiles"]:
+            report["note"] = "cProfile недоступен: этап шёл одновременно с другим профилируемым этапом"
+            return report
+
+        stats = pstats.Stats(entry["profiles"][0])
+        for profile in entry["profiles"][1:]:
+            stats.add(profile)
+        prof_path = os.path.join(self.out_dir, f"stage-{name}.prof")
+        stats.dump_stats(prof_path)
+
+        functions = []
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            functions.append({"function": f"{filename}:{line}({function})", "calls": calls,
+                              "tottime": round(tottime, 6), "cumtime": round(cumtime, 6)})
+        report["pstats"] = prof_path
+        report["top_cumulative"] = sorted(functions, key=lambda f: f["cumtime"], reverse=True)[:self.top]
+        report["top_self"] = sorted(functions, key=lambda f: f["tottime"], reverse=True)[:self.top]
+        return report
+
+    def _memory_report(self):
+        current, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().statistics('lineno')
+        return {
+            "peak_bytes": peak,
+            "current_bytes": current,
+            "top_allocators": [
+                {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 "size_bytes": stat.size, "count": stat.count}
+                for stat in statistics[:self.top]
+            ]
+        }
+
+    def finish(self, script):
+        """Запись отчёта; возвращает список превышенных бюджетов"""
+        wall = time.perf_counter() - self.started
+        os.makedirs(self.out_dir, exist_ok=True)
+        memory = self._memory_report()
+        tracemalloc.stop()
+        with self._lock:
+            stages = {name: dict(entry, profiles=list(entry["profiles"])) for name, entry in self.stages.items()}
+
+        exceeded = []
+        if self.time_budget is not None and wall > self.time_budget:
+            exceeded.append(f"время {wall:.2f} с > {self.time_budget:.2f} с")
+        peak_mb = memory["peak_bytes"] / 1024 / 1024
+        if self.memory_budget is not None and peak_mb > self.memory_budget:
+            exceeded.append(f"память {peak_mb:.1f} МБ > {self.memory_budget:.1f} МБ")
+
+        report = {
+            "script": os.path.basename(script),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "wall_seconds": round(wall, 4),
+            "stages": {name: self._stage_report(name, entry) for name, entry in stages.items()},
+            "memory": memory,
+            "imports": import_costs(script),
+            "budget": {"time_seconds": self.time_budget, "memory_mb": self.memory_budget, "exceeded": exceeded}
+        }
+        report_path = os.path.join(self.out_dir, "report.json")
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        print(f"🔬 Профиль: {report_path} (время {wall:.2f} с, пик памяти {peak_mb:.1f} МБ, "
+              f"импорт {report['imports']['interpreter_and_imports_seconds']:.2f} с)")
+        for message in exceeded:
+            print(f"❌ Бюджет превышен: {message}")
+        return exceeded
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+
+
+class Deadline:
+    """Общий срок выполнения, от которого считаются таймауты отдельных вызовов"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def reserve(self, seconds):
+        """Срок, который наступает на seconds раньше (запас на последующие этапы)"""
+        child = Deadline(0)
+        child.seconds = max(0.0, self.seconds - seconds)
+        child.expires = self.expires - seconds
+        return child
+
+
+class Provider:
+    """Один источник текста или изображения
+
+    func получает таймаут в секундах и возвращает результат или None.
+    weight — доля оставшегося бюджета относительно следующих источников,
+    instant — источник мгновенный и вызывается даже после истечения срока.
+    """
+
+    def __init__(self, name, func, weight=1.0, instant=False):
+        self.name = name
+        self.func = func
+        self.weight = weight
+        self.instant = instant
+
+
+class ProviderChain:
+    """Цепочка источников с общим бюджетом времени
+
+    Оставшееся время делится между ещё не опрошенными источниками по весам,
+    поэтому сэкономленное одним источником достаётся следующим, а вся
+    цепочка укладывается в срок и отдаёт лучший доступный результат.
+    """
+
+    def __init__(self, kind, providers, metrics=None):
+        self.kind = kind
+        self.providers = providers
+        self.metrics = metrics
+
+    def run(self, deadline):
+        for index, provider in enumerate(self.providers):
+            remaining = deadline.remaining()
+            if remaining <= 0 and not provider.instant:
+                print(f"⏰ Нет времени на {provider.name}, пропускаем")
+                continue
+
+            weights = sum(p.weight for p in self.providers[index:] if not p.instant) or 1.0
+            timeout = remaining if provider.instant else remaining * provider.weight / weights
+            print(f"🔗 {self.kind}: {provider.name} (до {timeout:.1f} с)")
+
+            started = time.perf_counter()
+            try:
+                result = provider.func(timeout)
+            except Exception as e:
+                print(f"⚠️ {provider.name}: {e}")
+                result = None
+
+            if self.metrics is not None:
+                self.metrics.observe("provider_seconds", time.perf_counter() - started,
+                                     kind=self.kind, provider=provider.name,
+                                     outcome="ok" if result else "empty")
+            if result:
+                if self.metrics is not None:
+                    self.metrics.inc("provider_used_total", kind=self.kind, provider=provider.name)
+                return result
+        return None
+
+
+def generation_budget():
+    """Бюджет одного запуска генерации в секундах (GENERATION_BUDGET)"""
+    return float(os.environ.get('GENERATION_BUDGET', '240'))
+
+
+def cached_default_image(artifacts):
+    """Последнее сохранённое изображение как запасной вариант"""
+    blobs = artifacts.blobs()
+    if not blobs:
+        return None
+    latest = max(blobs, key=os.path.getmtime)
+    print(f"🗂️ Используем последнее сохранённое изображение: {latest}")
+    return latest
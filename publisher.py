@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Публикация статей в CMS (Tilda или совместимый HTTP-эндпоинт)
+
+Записи попадают в очередь outbox.db и отправляются пачками в POST
+{"records": [{"idempotency_key": ..., "article_id": ..., "record": {...}}]}
+с заголовком Idempotency-Key. article_id — номер статьи в архиве: по нему
+CMS заменяет уже опубликованную статью, если запись изменилась (например,
+подставлено готовое изображение). Запись считается отправленной только после ответа 2xx,
+поэтому перезапуск не теряет публикации, а повтор с тем же ключом сервер
+может отбросить как дубликат.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from article_archive import ArticleArchive
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    article_id INTEGER,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt, id);
+CREATE TABLE IF NOT EXISTS outbox_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Пауза перед повтором: base * 2^попытки со случайным разбросом, не больше MAX_BACKOFF
+BASE_BACKOFF = 2.0
+MAX_BACKOFF = 900.0
+
+
+def idempotency_key(record):
+    """Ключ записи: SHA-256 канонического JSON"""
+    canonical = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class Outbox:
+    """Очередь публикаций в SQLite: pending → sent или failed"""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('PUBLISH_OUTBOX', 'outbox.db')
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(SCHEMA)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(outbox)")}
+        if "article_id" not in columns:
+            self.connection.execute("ALTER TABLE outbox ADD COLUMN article_id INTEGER")
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, record, article_id=None):
+        """Постановка записи в очередь; уже известная запись не дублируется"""
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO outbox (idempotency_key, article_id, payload, created_at) VALUES (?, ?, ?, ?)",
+                (idempotency_key(record), article_id, json.dumps(record, ensure_ascii=False), time.time()))
+        return cursor.rowcount == 1
+
+    def add_archive(self, archive):
+        """Новые статьи архива и изменённые после прошлого вызова"""
+        state = dict(self.connection.execute("SELECT name, value FROM outbox_state"))
+        last_id = archive.last_id()
+        revision = archive.last_revision()
+        queued_id = state.get('archive_id', 0)
+        # Изменённые статьи, которые уже стояли в очереди в прежнем виде, затем новые
+        records = archive.updated_since(state.get('archive_revision', 0), queued_id)
+        records += archive.id_range(queued_id + 1, last_id)
+        added = sum(self.add(record, article_id) for article_id, record in records)
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO outbox_state (name, value) VALUES (?, ?)",
+                [('archive_id', last_id), ('archive_revision', revision)])
+        return added
+
+    def due(self, limit):
+        """Записи, которые пора отправить: (номер, ключ, номер статьи, запись, попыток)"""
+        rows = self.connection.execute(
+            "SELECT id, idempotency_key, article_id, payload, attempts FROM outbox "
+            "WHERE status = 'pending' AND next_attempt <= ? ORDER BY id LIMIT ?", (time.time(), limit))
+        return [(row[0], row[1], row[2], json.loads(row[3]), row[4]) for row in rows]
+
+    def mark_sent(self, ids):
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                [(time.time(), row_id) for row_id in ids])
+
+    def mark_retry(self, ids, error, delay, max_attempts):
+        """Повтор через delay секунд; после max_attempts попыток — failed"""
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END WHERE id = ?",
+                [(error, time.time() + delay, max_attempts, row_id) for row_id in ids])
+
+    def mark_failed(self, ids, error):
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, status = 'failed', last_error = ? WHERE id = ?",
+                [(error, row_id) for row_id in ids])
+
+    def next_due(self):
+        """Когда подойдёт срок ближайшей записи в очереди (None, если очередь пуста)"""
+        return self.connection.execute(
+            "SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def counts(self):
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"))
+
+
+class Publisher:
+    """Отправка очереди пачками по batch_size, не больше concurrency запросов одновременно
+
+    Все обращения к outbox.db идут из вызывающего потока, в пуле выполняются
+    только HTTP-запросы через общий пул соединений.
+    """
+
+    def __init__(self, endpoint=None, token=None, outbox=None, batch_size=10, concurrency=4,
+                 max_attempts=8, timeout=15):
+        self.endpoint = endpoint or os.environ.get('TILDA_ENDPOINT', '')
+        self.token = token if token is not None else os.environ.get('TILDA_TOKEN', '')
+        self.outbox = outbox or Outbox()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.rng = random.Random()
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _send(self, batch):
+        """Один POST с пачкой; возвращает (пачка, код ответа или None, Retry-After, ошибка)"""
+        keys = [key for _, key, _, _, _ in batch]
+        headers = {
+            "Content-Type": "application/json",
+            "Idempotency-Key": hashlib.sha256("\n".join(keys).encode('utf-8')).hexdigest()
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        body = {"records": [{"idempotency_key": key, "article_id": article_id, "record": record}
+                            for _, key, article_id, record, _ in batch]}
+
+        try:
+            response = self.session.post(self.endpoint, headers=headers, json=body, timeout=self.timeout)
+        except requests.RequestException as e:
+            return batch, None, None, str(e)
+        return batch, response.status_code, response.headers.get("Retry-After"), response.text[:200]
+
+    def _backoff(self, attempts, retry_after):
+        """Пауза перед повтором: Retry-After сервера или экспонента с разбросом"""
+        if retry_after:
+            try:
+                return min(MAX_BACKOFF, float(retry_after))
+            except ValueError:
+                pass
+        delay = BASE_BACKOFF * 2 ** attempts
+        return min(MAX_BACKOFF, delay * self.rng.uniform(0.5, 1.5))
+
+    def _handle(self, batch, status, retry_after, error):
+        ids = [row_id for row_id, _, _, _, _ in batch]
+        if status is not None and (200 <= status < 300 or status == 409):
+            # 409: сервер уже принял запись с этим ключом
+            self.outbox.mark_sent(ids)
+            return "sent"
+        if status is None or status == 429 or status >= 500 or status == 408:
+            attempts = max(attempts for _, _, _, _, attempts in batch)
+            self.outbox.mark_retry(ids, f"{status or 'network'}: {error}",
+                                   self._backoff(attempts, retry_after), self.max_attempts)
+            return "retry"
+        # Остальные 4xx повтор не исправит
+        self.outbox.mark_failed(ids, f"{status}: {error}")
+        return "failed"
+
+    def flush(self, deadline=None):
+        """Отправка всего, что пора отправить; с deadline (секунды) ждёт и повторы"""
+        if not self.endpoint:
+            print("⚠️ TILDA_ENDPOINT не задан, публикация пропущена")
+            return {}
+
+        stop_at = time.time() + deadline if deadline else None
+        results = {"sent": 0, "retry": 0, "failed": 0}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while True:
+                rows = self.outbox.due(self.batch_size * self.concurrency)
+                if not rows:
+                    next_due = self.outbox.next_due()
+                    if next_due is None or stop_at is None or next_due >= stop_at:
+                        break
+                    time.sleep(max(0.0, next_due - time.time()))
+                    continue
+
+                batches = [rows[i:i + self.batch_size] for i in range(0, len(rows), self.batch_size)]
+                for batch, status, retry_after, error in pool.map(self._send, batches):
+                    outcome = self._handle(batch, status, retry_after, error)
+                    results[outcome] += len(batch)
+                    if outcome != "sent":
+                        print(f"⚠️ Пачка из {len(batch)}: {status or 'нет ответа'} — {outcome}")
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", default=None, help="URL CMS (по умолчанию TILDA_ENDPOINT)")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    enqueue_parser = subparsers.add_parser("enqueue", help="поставить статьи в очередь")
+    enqueue_parser.add_argument("--file", default="tilda_data.json", help="JSON одной статьи")
+    enqueue_parser.add_argument("--archive", action="store_true", help="новые статьи архива вместо файла")
+    flush_parser = subparsers.add_parser("flush", help="отправить очередь")
+    flush_parser.add_argument("--wait", type=float, default=None, help="ждать повторов до N секунд")
+    publish_parser = subparsers.add_parser("publish", help="поставить новые статьи архива в очередь и отправить")
+    publish_parser.add_argument("--wait", type=float, default=None, help="ждать повторов до N секунд")
+    subparsers.add_parser("status", help="состояние очереди")
+    args = parser.parse_args()
+
+    outbox = Outbox()
+    if args.command in ("enqueue", "publish"):
+        if args.command == "publish" or args.archive:
+            with ArticleArchive() as archive:
+                added = outbox.add_archive(archive)
+        else:
+            with open(args.file, 'r', encoding='utf-8') as f:
+                added = int(outbox.add(json.load(f)))
+        print(f"📥 В очередь добавлено: {added}")
+
+    if args.command in ("flush", "publish"):
+        publisher = Publisher(args.endpoint, outbox=outbox, batch_size=args.batch_size,
+                              concurrency=args.concurrency)
+        results = publisher.flush(args.wait)
+        if results:
+            print(f"📤 Отправлено: {results['sent']}, отложено: {results['retry']}, отклонено: {results['failed']}")
+
+    print(f"📊 Очередь: {outbox.counts()}")
+    outbox.close()
+
+
+if __name__ == "__main__":
+    main()
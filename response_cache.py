@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class ResponseCache:
+    """Кэш ответов текстовых моделей с ключом «модель + запрос + параметры»
+
+    Ответ считается свежим ttl секунд, устаревшим — до stale_ttl, после чего
+    удаляется. Каждый ответ публикуется один раз (served), но все тексты
+    остаются в пуле для локальной генерации. Сверх max_entries вытесняются
+    самые старые ответы.
+    """
+
+    def __init__(self, path=None, ttl=None, stale_ttl=None, max_entries=None):
+        self.path = path or os.environ.get('HF_RESPONSE_CACHE', 'hf_responses.json')
+        self.ttl = ttl or float(os.environ.get('HF_CACHE_TTL', '21600'))
+        self.stale_ttl = stale_ttl or float(os.environ.get('HF_CACHE_STALE', '604800'))
+        self.max_entries = max_entries or int(os.environ.get('HF_CACHE_MAX_ENTRIES', '200'))
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = []
+
+    @staticmethod
+    def key(model, payload):
+        """Ключ ответа: модель и канонический JSON запроса"""
+        canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(f"{model}\n{canonical}".encode('utf-8')).hexdigest()
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _expire(self):
+        """Удаление ответов старше stale_ttl и вытеснение сверх лимита"""
+        oldest = time.time() - self.stale_ttl
+        self.entries = [entry for entry in self.entries if entry["created"] >= oldest]
+        self.entries.sort(key=lambda entry: entry["created"])
+        del self.entries[:-self.max_entries]
+
+    def put(self, model, payload, text):
+        """Сохранение ответа модели"""
+        with self._lock:
+            self.entries.append({
+                "key": self.key(model, payload),
+                "model": model,
+                "text": text,
+                "created": time.time(),
+                "served": False
+            })
+            self._expire()
+            self._save()
+
+    def take(self, models, payload, allow_stale=False):
+        """Самый новый неопубликованный ответ одной из моделей
+
+        Возвращает (текст, свежий ли он) или (None, None); ответ отмечается опубликованным.
+        """
+        keys = {self.key(model, payload) for model in models}
+        now = time.time()
+        with self._lock:
+            for entry in reversed(self.entries):
+                if entry["served"] or entry["key"] not in keys:
+                    continue
+                fresh = now - entry["created"] < self.ttl
+                if not fresh and not allow_stale:
+                    continue
+                entry["served"] = True
+                self._save()
+                return entry["text"], fresh
+        return None, None
+
+    def mark_served(self, text):
+        """Отметка ответа, опубликованного напрямую от модели"""
+        with self._lock:
+            for entry in self.entries:
+                if entry["text"] == text:
+                    entry["served"] = True
+            self._save()
+
+    def texts(self):
+        """Все сохранённые тексты для пула локальной генерации"""
+        with self._lock:
+            return [entry["text"] for entry in self.entries]
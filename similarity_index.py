@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import struct
+from array import array
+from collections import Counter
+
+from article_archive import ArticleArchive
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    label TEXT,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    bucket INTEGER PRIMARY KEY,
+    documents BLOB NOT NULL
+);
+"""
+SCHEMA_VERSION = 2
+
+# Простое число Мерсенна 2^61 - 1: хэш (a * x + b) mod p из универсального семейства
+MERSENNE = (1 << 61) - 1
+EMPTY = MERSENNE
+# Сколько случайных корзин-доноров перебирается для пустой корзины при уплотнении
+DONORS = 32
+
+
+class SimilarityIndex:
+    """MinHash/LSH-индекс опубликованных статей для отсева почти-дубликатов
+
+    Текст разбивается на шинглы из shingle_size слов. Подпись из bands * rows
+    значений строится одной перестановкой (one permutation hashing): каждый
+    шингл хэшируется один раз функцией (a * x + b) mod p и попадает в одну
+    корзину, в которой хранится минимум; пустые корзины заполняются
+    оптимальным уплотнением (значение случайной непустой корзины).
+
+    Подпись режется на полосы, и для каждой полосы в SQLite хранится список
+    статей с тем же ключом корзины. Поиск похожих — чтение bands списков,
+    подсчёт общих полос и сравнение подписей только у кандидатов с наибольшим
+    их числом. Для сравнения хранятся младшие 8 бит значений (b-bit MinHash),
+    случайные совпадения которых вычитаются из оценки.
+    Порог срабатывания LSH примерно (1 / bands) ** (1 / rows) ≈ 0.83.
+    """
+
+    def __init__(self, path=None, threshold=None, bands=10, rows=12, shingle_size=3, max_candidates=20):
+        self.path = path or os.environ.get('SIMILARITY_INDEX', 'similarity.db')
+        if threshold is None:
+            threshold = float(os.environ.get('SIMILARITY_THRESHOLD', '0.85'))
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.size = bands * rows
+        self.shingle_size = shingle_size
+        self.max_candidates = max_candidates
+
+        # Фиксированные параметры хэша и доноров, чтобы подписи совпадали между запусками
+        rng = random.Random(20240823)
+        self.a = rng.randrange(1, MERSENNE)
+        self.b = rng.randrange(MERSENNE)
+        self.donors = [[rng.randrange(self.size) for _ in range(DONORS)] for _ in range(self.size)]
+        self.band_format = struct.Struct(f'<I{rows}Q')
+
+        self.connection = sqlite3.connect(self.path)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._rebuild()
+
+    def close(self):
+        self.connection.close()
+
+    def _rebuild(self):
+        """Создание схемы; индекс прежнего формата перестраивается по архиву статей"""
+        tables = {row[0] for row in self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        outdated = "documents" in tables
+        self.connection.executescript(
+            "DROP TABLE IF EXISTS documents; DROP TABLE IF EXISTS bands; DROP TABLE IF EXISTS postings;" + SCHEMA)
+        records = []
+        if outdated:
+            with ArticleArchive() as archive:
+                records = archive.id_range(1, archive.last_id())
+        with self.connection:
+            for _, record in records:
+                self._insert(self.signature(record.get("content", "")))
+        # Версия ставится последней: прерванная перестройка повторится при следующем запуске
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        if outdated:
+            print(f"🔁 Индекс сходства перестроен по архиву: {len(records)} статей")
+
+    def _shingles(self, text):
+        """Хэши шинглов из нескольких подряд идущих слов"""
+        words = re.findall(r'\w+', text.lower())
+        size = min(self.shingle_size, len(words)) or 1
+        return {
+            int.from_bytes(hashlib.blake2b(' '.join(words[i:i + size]).encode('utf-8'),
+                                           digest_size=8).digest(), 'little')
+            for i in range(max(1, len(words) - size + 1))
+        }
+
+    def signature(self, text):
+        """Подпись MinHash текста одной перестановкой"""
+        a, b, size = self.a, self.b, self.size
+        bins = [EMPTY] * size
+        for shingle in self._shingles(text):
+            value, index = divmod((a * shingle + b) % MERSENNE, size)
+            if value < bins[index]:
+                bins[index] = value
+
+        if EMPTY not in bins:
+            return bins
+        # Пустая корзина берёт значение первой непустой из своего фиксированного списка доноров
+        filled = list(bins)
+        for index, value in enumerate(bins):
+            if value != EMPTY:
+                continue
+            for donor in self.donors[index]:
+                if bins[donor] != EMPTY:
+                    filled[index] = bins[donor]
+                    break
+            else:
+                # Очень короткий текст: ближайшая непустая корзина по кругу
+                filled[index] = next(bins[(index + step) % size] for step in range(1, size)
+                                     if bins[(index + step) % size] != EMPTY)
+        return filled
+
+    def _buckets(self, signature):
+        """Ключи корзин LSH: хэш номера полосы и её значений"""
+        buckets = []
+        for band in range(self.bands):
+            values = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(self.band_format.pack(band, *values), digest_size=8).digest()
+            buckets.append(int.from_bytes(digest, 'little', signed=True))
+        return buckets
+
+    def _compact(self, signature):
+        """Младшие 8 бит значений подписи для сравнения"""
+        return bytes(value & 0xFF for value in signature)
+
+    def _estimate(self, compact, stored):
+        """Оценка сходства Жаккара по 8-битным подписям; compact — подпись в виде числа"""
+        matches = (compact ^ int.from_bytes(stored, 'little')).to_bytes(self.size, 'little').count(0)
+        # Младшие байты разных значений совпадают случайно с вероятностью 1/256
+        return max(0.0, (matches / self.size - 1 / 256) / (1 - 1 / 256))
+
+    def most_similar(self, text):
+        """Наибольшая оценка сходства Жаккара с опубликованными статьями"""
+        signature = self.signature(text)
+        buckets = self._buckets(signature)
+
+        shared = Counter()
+        placeholders = ', '.join('?' for _ in buckets)
+        for (blob,) in self.connection.execute(
+                f"SELECT documents FROM postings WHERE bucket IN ({placeholders})", buckets):
+            shared.update(array('I', blob))
+        if not shared:
+            return 0.0
+
+        candidates = [document for document, _ in shared.most_common(self.max_candidates)]
+        placeholders = ', '.join('?' for _ in candidates)
+        compact = int.from_bytes(self._compact(signature), 'little')
+        return max(self._estimate(compact, blob) for (blob,) in self.connection.execute(
+            f"SELECT signature FROM documents WHERE id IN ({placeholders})", candidates))
+
+    def _insert(self, signature, label=None):
+        """Запись подписи и дописывание номера статьи в списки её корзин, без фиксации"""
+        cursor = self.connection.execute(
+            "INSERT INTO documents (label, signature) VALUES (?, ?)", (label, self._compact(signature)))
+        document = array('I', [cursor.lastrowid]).tobytes()
+        for bucket in self._buckets(signature):
+            row = self.connection.execute("SELECT documents FROM postings WHERE bucket = ?", (bucket,)).fetchone()
+            self.connection.execute("INSERT OR REPLACE INTO postings (bucket, documents) VALUES (?, ?)",
+                                    (bucket, (row[0] if row else b'') + document))
+
+    def add(self, text, label=None):
+        """Добавление опубликованной статьи в индекс"""
+        with self.connection:
+            self._insert(self.signature(text), label)
+
+    def admit(self, text, regenerate, attempts=3, label=None):
+        """Пропуск статьи через фильтр: похожие перегенерируются до attempts раз
+
+        Если уникальнее не получилось, публикуется наименее похожий вариант.
+        """
+        best_text, best_similarity = text, None
+        for attempt in range(attempts + 1):
+            similarity = self.most_similar(text)
+            if best_similarity is None or similarity < best_similarity:
+                best_text, best_similarity = text, similarity
+            if similarity < self.threshold:
+                break
+
+            print(f"♻️ Статья похожа на опубликованную (сходство {similarity:.2f})")
+            if attempt < attempts:
+                print("🔄 Генерируем другую статью...")
+                text = regenerate()
+        else:
+            print(f"⚠️ Уникальнее не получилось, берём вариант со сходством {best_similarity:.2f}")
+
+        self.add(best_text, label)
+        return best_text
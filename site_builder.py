@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import gzip
+import hashlib
+import html
+import json
+import os
+
+from article_archive import ArticleArchive
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Меняется при правке шаблонов, чтобы пересобрать весь сайт
+TEMPLATE_VERSION = 2
+
+# Ширина изображения в вёрстке: контейнер 800px минус поля
+IMAGE_SIZES = "(max-width: 800px) 100vw, 760px"
+
+STYLE = """
+        body { font-family: 'Arial', sans-serif; line-height: 1.6; margin: 0; padding: 20px; background: #f5f5f5; }
+        .container { max-width: 800px; margin: 0 auto; background: white; padding: 20px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+        .content { background: #f8f9fa; padding: 25px; border-radius: 8px; border-left: 4px solid #3498db; }
+        .content p { margin: 15px 0; text-align: justify; font-size: 16px; }
+        .meta, .footer { color: #7f8c8d; font-size: 14px; }
+        .item { padding: 15px 0; border-bottom: 1px solid #ddd; }
+        .nav { margin-top: 20px; display: flex; justify-content: space-between; }
+        img { max-width: 100%; height: auto; border-radius: 8px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); margin: 20px 0; }
+"""
+
+
+def page_html(title, body):
+    """Общая обёртка страницы"""
+    return f"""<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{html.escape(title)}</title>
+    <style>{STYLE}    </style>
+</head>
+<body>
+    <div class="container">
+{body}
+    </div>
+</body>
+</html>
+"""
+
+
+class SiteBuilder:
+    """Инкрементальная сборка статического сайта из архива статей"""
+
+    def __init__(self, out_dir='site', page_size=10, archive=None):
+        self.out_dir = out_dir
+        self.page_size = page_size
+        self.archive = archive or ArticleArchive()
+        self.manifest_path = os.path.join(out_dir, '.manifest.json')
+        self.manifest = self._load_manifest()
+        self.rebuilt = []
+        self.skipped = 0
+
+    def _load_manifest(self):
+        """Манифест сборки: хэши входных данных каждой страницы"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        if manifest.get('version') != [TEMPLATE_VERSION, self.page_size]:
+            manifest = {'version': [TEMPLATE_VERSION, self.page_size], 'last_id': 0, 'revision': 0, 'pages': {}}
+        return manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _link(self, page_path, target):
+        """Относительная ссылка со страницы page_path на файл target"""
+        page_dir = os.path.dirname(os.path.join(self.out_dir, page_path))
+        return os.path.relpath(target, page_dir).replace(os.sep, '/')
+
+    def _emit(self, page_path, inputs, render):
+        """Запись страницы, если её входные данные изменились"""
+        input_hash = hashlib.sha256(
+            json.dumps(inputs, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+        full_path = os.path.join(self.out_dir, page_path)
+
+        if self.manifest['pages'].get(page_path) == input_hash and os.path.exists(full_path):
+            self.skipped += 1
+            return
+
+        data = render().encode('utf-8')
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        outputs = [(full_path, data), (full_path + '.gz', gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            outputs.append((full_path + '.br', brotli.compress(data)))
+
+        for path, payload in outputs:
+            with open(path + '.tmp', 'wb') as f:
+                f.write(payload)
+            os.replace(path + '.tmp', path)
+
+        self.manifest['pages'][page_path] = input_hash
+        self.rebuilt.append(page_path)
+
+    # Шаблоны страниц
+
+    def _article_body(self, page_path, record):
+        paragraphs = "\n".join(
+            f"            <p>{html.escape(part.strip())}</p>"
+            for part in record['content'].split("\n\n") if part.strip())
+        image = ""
+        if record.get('image_path'):
+            image = (f'        <img src="{html.escape(self._link(page_path, record["image_path"]))}" '
+                     f'alt="{html.escape(record["title"])}">\n')
+        if record.get('image_path') and record.get('image_variants'):
+            image = self._picture(page_path, record)
+        return (f"        <h1>{html.escape(record['title'])}</h1>\n"
+                f"        <p class=\"meta\">{html.escape(record['date'])} · "
+                f"{html.escape(', '.join(record.get('tags', [])))}</p>\n"
+                f"{image}"
+                f"        <div class=\"content\">\n{paragraphs}\n        </div>\n"
+                f"        <div class=\"footer\">Обновлено: {html.escape(record['date'])}</div>")
+
+    def _picture(self, page_path, record):
+        """Изображение с вариантами WebP/JPEG по ширине экрана"""
+        variants = record['image_variants']
+
+        def srcset(fmt):
+            return ", ".join(f"{html.escape(self._link(page_path, entry[fmt]))} {entry['width']}w"
+                             for entry in variants.values())
+
+        largest = max(variants.values(), key=lambda entry: entry['width'])
+        return (f"        <picture>\n"
+                f"            <source type=\"image/webp\" srcset=\"{srcset('webp')}\" sizes=\"{IMAGE_SIZES}\">\n"
+                f"            <img src=\"{html.escape(self._link(page_path, largest['jpeg']))}\" "
+                f"srcset=\"{srcset('jpeg')}\" sizes=\"{IMAGE_SIZES}\" "
+                f"width=\"{largest['width']}\" height=\"{largest['height']}\" decoding=\"async\" "
+                f"alt=\"{html.escape(record['title'])}\">\n"
+                f"        </picture>\n")
+
+    def _listing_body(self, page_path, page, articles):
+        items = "\n".join(
+            f"        <div class=\"item\">\n"
+            f"            <h2><a href=\"{self._link(page_path, os.path.join(self.out_dir, 'articles', f'{article_id}.html'))}\">"
+            f"{html.escape(record['title'])}</a></h2>\n"
+            f"            <p class=\"meta\">{html.escape(record['date'])}</p>\n"
+            f"            <p>{html.escape(record['short_description'])}</p>\n"
+            f"        </div>"
+            for article_id, record in reversed(articles))
+
+        nav = []
+        if page['next']:
+            nav.append(f'<a href="{self._link(page_path, self._page_file(page["number"] + 1))}">← Новее</a>')
+        if page['number'] > 1:
+            nav.append(f'<a href="{self._link(page_path, self._page_file(page["number"] - 1))}">Старее →</a>')
+
+        return (f"        <header><h1>🤖 Новости нейросетей и технологий</h1></header>\n"
+                f"{items}\n"
+                f"        <div class=\"nav\">{''.join(nav)}</div>")
+
+    def _page_file(self, number):
+        return os.path.join(self.out_dir, 'page', f'{number}.html')
+
+    # Сборка
+
+    def _build_listing(self, number, last_id):
+        """Страница списка number и, если она последняя, главная страница"""
+        first_id = (number - 1) * self.page_size + 1
+        articles = self.archive.id_range(first_id, min(number * self.page_size, last_id))
+        page = {
+            'number': number,
+            'next': number * self.page_size < last_id,
+            'ids': [article_id for article_id, _ in articles],
+            'titles': [record['title'] for _, record in articles]
+        }
+
+        page_path = f"page/{number}.html"
+        self._emit(page_path, page, lambda: page_html(
+            "Новости нейросетей", self._listing_body(page_path, page, articles)))
+
+        if not page['next']:
+            self._emit("index.html", page, lambda: page_html(
+                "Новости нейросетей", self._listing_body("index.html", page, articles)))
+
+    def _build_article(self, article_id, record):
+        page_path = f"articles/{article_id}.html"
+        self._emit(page_path, record, lambda: page_html(
+            record['title'], self._article_body(page_path, record)))
+
+    def build(self, full=False):
+        """Пересборка страниц, затронутых новыми и изменёнными статьями"""
+        self.rebuilt = []
+        self.skipped = 0
+        last_id = self.archive.last_id()
+        revision = self.archive.last_revision()
+        built_id = 0 if full else self.manifest['last_id']
+        if full:
+            self.manifest['pages'] = {}
+
+        # Уже собранные статьи, изменённые после прошлой сборки (подставленное изображение)
+        for article_id, record in self.archive.updated_since(self.manifest.get('revision', 0), built_id):
+            self._build_article(article_id, record)
+
+        # Новые статьи
+        for article_id, record in self.archive.id_range(built_id + 1, last_id):
+            self._build_article(article_id, record)
+
+        # Страницы списка, куда попали новые статьи, и предыдущая (ссылка «новее»)
+        if last_id:
+            first_page = max(1, (max(built_id, 1) - 1) // self.page_size + 1)
+            last_page = (last_id - 1) // self.page_size + 1
+            for number in range(first_page, last_page + 1):
+                self._build_listing(number, last_id)
+
+            # Страница «текущая новость»
+            _, latest = self.archive.id_range(last_id, last_id)[0]
+            self._emit("current-news.html", latest, lambda: page_html(
+                "Новости AI", self._article_body("current-news.html", latest)))
+
+        self.manifest['last_id'] = last_id
+        self.manifest['revision'] = revision
+        self._save_manifest()
+        return self.rebuilt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка статического сайта из архива статей")
+    parser.add_argument("--out", default="site", help="каталог сайта")
+    parser.add_argument("--page-size", type=int, default=10, help="статей на странице списка")
+    parser.add_argument("--full", action="store_true", help="пересобрать все страницы")
+    args = parser.parse_args()
+
+    print("🏗️ Сборка сайта...")
+    with ArticleArchive() as archive:
+        builder = SiteBuilder(args.out, args.page_size, archive)
+        rebuilt = builder.build(full=args.full)
+
+    for page_path in rebuilt:
+        print(f"📄 {page_path}")
+    print(f"✅ Пересобрано страниц: {len(rebuilt)}, без изменений: {builder.skipped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from stub_server import StubServer
+
+
+@pytest.fixture
+def stub():
+    """Локальная заглушка Unsplash, Hugging Face и CMS без задержек и ошибок"""
+    server = StubServer(image_latency=0.0, text_latency=0.0, sd_latency=0.0, publish_latency=0.0,
+                        jitter=0.0, model_latency={}, path_latency={}).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def update_news(monkeypatch, tmp_path, stub):
+    """Генератор из update-news.py, работающий с заглушкой во временном каталоге"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HF_API_BASE", stub.base_url)
+    # Проигравшие потоки доживают после теста: их файлы — по абсолютным путям во временном каталоге
+    monkeypatch.setenv("HF_RESPONSE_CACHE", str(tmp_path / "hf_responses.json"))
+    monkeypatch.setenv("MODEL_HEALTH", str(tmp_path / "model_health.json"))
+    spec = importlib.util.spec_from_file_location("update_news", os.path.join(ROOT, "update-news.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.ContentGenerator()
@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+from article_archive import ArticleArchive
+
+
+def record(number, day, tags=("AI",), author=None):
+    return {"title": f"Статья {number}", "date": f"{day:02d}.01.2025 10:00", "content": f"Текст {number}",
+            "tags": list(tags), "author": author, "image_path": f"images/{number}.jpg"}
+
+
+def fill(archive):
+    archive.append(record(1, 1, ("AI", "роботы"), "Анна"))
+    archive.append(record(2, 2, ("AI",)))
+    archive.append(record(3, 3, ("роботы",), "Анна"))
+
+
+def test_queries_use_publication_order(tmp_path):
+    with ArticleArchive(str(tmp_path / "articles.db")) as archive:
+        fill(archive)
+        assert archive.count() == 3
+        assert [r["title"] for r in archive.latest(2)] == ["Статья 3", "Статья 2"]
+        assert [r["title"] for r in archive.by_tag("роботы")] == ["Статья 3", "Статья 1"]
+        assert [r["title"] for r in archive.by_author("Анна", 1)] == ["Статья 3"]
+        assert [r["title"] for r in archive.by_title("Статья 2")] == ["Статья 2"]
+        assert [r["title"] for r in archive.date_range("2025-01-01", "2025-01-02")] == ["Статья 2", "Статья 1"]
+
+
+def test_replaced_image_bumps_the_revision(tmp_path):
+    with ArticleArchive(str(tmp_path / "articles.db")) as archive:
+        fill(archive)
+        assert archive.last_revision() == 0
+        archive.replace_image(2, "images/ready.jpg")
+        archive.replace_image(1, "images/ready-1.jpg")
+
+        assert [article_id for article_id, _ in archive.updated_since(0)] == [2, 1]
+        assert archive.updated_since(archive.last_revision()) == []
+        assert archive.image_references() == {"images/ready.jpg", "images/ready-1.jpg", "images/3.jpg"}
+
+
+def test_cli_takes_output_options_after_the_command(tmp_path):
+    with ArticleArchive(str(tmp_path / "articles.db")) as archive:
+        fill(archive)
+    env = dict(os.environ, ARTICLE_ARCHIVE=str(tmp_path / "articles.db"))
+    completed = subprocess.run([sys.executable, os.path.join(ROOT, "article_archive.py"), "tag", "AI", "-n", "1", "--json"],
+                               env=env, capture_output=True, text=True, check=True)
+    assert [json.loads(line)["title"] for line in completed.stdout.splitlines()] == ["Статья 2"]
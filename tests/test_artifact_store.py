@@ -0,0 +1,37 @@
+import os
+import re
+
+from artifact_store import ArtifactStore, retained_references
+from article_archive import ArticleArchive
+from site_builder import SiteBuilder
+
+
+def put_image(store, tmp_path, content):
+    path = tmp_path / "upload.jpg"
+    path.write_bytes(content)
+    return store.put_file(str(path))
+
+
+def test_gc_keeps_every_image_the_site_links_to(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    store = ArtifactStore()
+    images = [put_image(store, tmp_path, f"image {number}".encode()) for number in range(3)]
+    orphan = put_image(store, tmp_path, b"orphan")
+    os.makedirs("images/variants")
+    for image in images + [orphan]:
+        open(f"images/variants/{os.path.basename(image)[:-4]}-480.webp", "wb").close()
+
+    with ArticleArchive() as archive:
+        for number, image in enumerate(images):
+            archive.append({"title": f"Статья {number}", "date": "01.01.2025 10:00", "content": "Текст",
+                            "short_description": "Текст", "tags": ["AI"], "image_path": image})
+        SiteBuilder("site", archive=archive).build()
+
+    removed = store.gc(retained_references())
+    assert sorted(removed) == sorted([orphan, f"images/variants/{os.path.basename(orphan)[:-4]}-480.webp"])
+
+    # Изображения всех страниц сайта на месте, включая самые старые
+    for number in range(1, 4):
+        page = open(f"site/articles/{number}.html", encoding="utf-8").read()
+        source, = re.findall(r'<img src="([^"]+)"', page)
+        assert os.path.exists(os.path.join("site/articles", source))
@@ -0,0 +1,39 @@
+import os
+
+import requests
+
+from http_cache import HttpCache
+
+
+def test_revalidation_and_offline_fallback(tmp_path, stub):
+    cache = HttpCache(str(tmp_path / "cache"))
+    session = requests.Session()
+    url = stub.base_url + "/photo.jpg"
+    dest = str(tmp_path / "image.jpg")
+
+    assert cache.fetch(session, url, dest) == "network"
+    body = open(dest, "rb").read()
+    assert len(body) == stub.config["image_size"]
+
+    # max-age=0: повторный запрос условный, тело не передаётся заново
+    os.remove(dest)
+    assert cache.fetch(session, url, dest) == "revalidated"
+    assert open(dest, "rb").read() == body
+    assert stub.requests["GET /photo.jpg"] == 2
+
+    # Индекс переживает перезапуск, без сети отдаётся сохранённое тело
+    stub.shutdown()
+    stub.server_close()
+    os.remove(dest)
+    assert HttpCache(str(tmp_path / "cache")).fetch(session, url, dest, timeout=1) == "offline"
+    assert open(dest, "rb").read() == body
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, stub):
+    cache = HttpCache(str(tmp_path / "cache"), max_bytes=int(stub.config["image_size"] * 1.5))
+    session = requests.Session()
+    for name in ("first", "second"):
+        cache.fetch(session, f"{stub.base_url}/{name}.jpg", str(tmp_path / f"{name}.jpg"))
+
+    assert list(cache.index) == [f"{stub.base_url}/second.jpg"]
+    assert len([name for name in os.listdir(tmp_path / "cache") if name != "index.json"]) == 1
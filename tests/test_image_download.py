@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import time
+
+from conftest import ROOT
+
+DOWNLOAD = (
+    "import sys; sys.path.insert(0, {root!r}); "
+    "from news_generator import ContentGenerator; "
+    "generator = ContentGenerator(seed=1); "
+    "print(generator._hedged_download([{slow!r}, {fast!r}], 'image.jpg'))"
+)
+
+
+def isolate(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    # Проигравший запрос доживает после теста: кэш — по абсолютному пути во временном каталоге
+    monkeypatch.setenv("HTTP_CACHE_DIR", str(tmp_path / ".http_cache"))
+
+
+def test_hedge_wins_over_slow_first_request(monkeypatch, tmp_path, stub):
+    isolate(monkeypatch, tmp_path)
+    from news_generator import ContentGenerator
+
+    stub.config["path_latency"] = {"/slow.jpg": 5.0}
+    generator = ContentGenerator(seed=1)
+    generator.image_latencies.append(0.3)
+
+    started = time.perf_counter()
+    assert generator._hedged_download([stub.base_url + "/slow.jpg", stub.base_url + "/fast.jpg"],
+                                      "image.jpg") == "image.jpg"
+    assert time.perf_counter() - started < 1.5
+    assert stub.requests["GET /fast.jpg"] == 1
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+
+def test_slow_loser_does_not_hold_the_process_open(monkeypatch, tmp_path, stub):
+    isolate(monkeypatch, tmp_path)
+    stub.config["path_latency"] = {"/slow.jpg": 8.0}
+    script = DOWNLOAD.format(root=ROOT, slow=stub.base_url + "/slow.jpg", fast=stub.base_url + "/fast.jpg")
+
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", script], cwd=tmp_path,
+                               capture_output=True, text=True, timeout=30)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip().endswith("image.jpg")
+    assert time.perf_counter() - started < 5.0
@@ -0,0 +1,45 @@
+import time
+
+import requests
+
+from artifact_store import ArtifactStore
+from article_archive import ArticleArchive
+from image_jobs import ImageJobs
+from providers import Deadline
+
+MODEL = "runwayml/stable-diffusion-v1-5"
+
+
+def make_jobs(tmp_path, stub, archive, estimated_time):
+    jobs = ImageJobs(ArtifactStore(str(tmp_path / "images")), archive, path=str(tmp_path / "image_jobs.json"))
+    job = jobs.submit(f"{stub.base_url}/models/{MODEL}", {"inputs": "robot"}, estimated_time)
+    article_id = archive.append({"title": "Статья", "date": "01.01.2025 10:00", "content": "Текст",
+                                 "tags": ["AI"], "image_path": "images/provisional.jpg"})
+    jobs.attach(job, article_id, "images/provisional.jpg")
+    return jobs, article_id
+
+
+def test_job_is_swapped_within_the_same_run(monkeypatch, tmp_path, stub):
+    monkeypatch.chdir(tmp_path)
+    with ArticleArchive(str(tmp_path / "articles.db")) as archive:
+        jobs, article_id = make_jobs(tmp_path, stub, archive, 0.3)
+        assert jobs.poll(requests.Session(), {}, Deadline(30), window=5) == 0
+
+        _, record = archive.id_range(article_id, article_id)[0]
+        assert record["image_path"].startswith(str(tmp_path / "images"))
+        assert archive.updated_since(0) == [(article_id, record)]
+    assert ImageJobs(None, None, path=str(tmp_path / "image_jobs.json")).jobs == []
+
+
+def test_poll_window_bounds_the_end_of_the_run(monkeypatch, tmp_path, stub):
+    monkeypatch.chdir(tmp_path)
+    stub.config["model_latency"] = {MODEL: 5.0}
+    with ArticleArchive(str(tmp_path / "articles.db")) as archive:
+        jobs, _ = make_jobs(tmp_path, stub, archive, 0.1)
+        later = jobs.submit(f"{stub.base_url}/models/{MODEL}", {"inputs": "later"}, 300)
+
+        started = time.perf_counter()
+        # Медленный ответ обрывается окном, задание остаётся на следующий запуск
+        assert jobs.poll(requests.Session(), {}, Deadline(30), window=1.5) == 2
+        assert time.perf_counter() - started < 2.0
+    assert later in ImageJobs(None, None, path=str(tmp_path / "image_jobs.json")).jobs
@@ -0,0 +1,61 @@
+from model_health import ModelHealth
+
+
+def test_circuit_opens_after_consecutive_failures(tmp_path):
+    health = ModelHealth(str(tmp_path / "model_health.json"), cooldown=60)
+    for _ in range(3):
+        assert health.state("model") == "closed"
+        health.record("model", False, 1.0)
+    assert health.state("model") == "open"
+    assert health.order(["model", "other"]) == ["other"]
+
+    # После паузы — одна пробная попытка, успех замыкает цепь
+    opened_at = health.models["model"]["opened_at"]
+    assert health.state("model", now=opened_at + 60) == "half_open"
+    health.models["model"]["opened_at"] -= 60
+    health.record("model", True, 1.0)
+    assert health.state("model") == "closed"
+
+    health.save()
+    assert ModelHealth(str(tmp_path / "model_health.json")).models == health.models
+
+
+def test_cut_off_is_not_a_failure(tmp_path):
+    health = ModelHealth(str(tmp_path / "model_health.json"))
+    for _ in range(5):
+        health.record_cut_off("model", 20.0)
+    entry = health.models["model"]
+    assert (entry["failures"], entry["success"], health.state("model")) == (0, 0.5, "closed")
+    assert entry["latency"] > 15.0
+
+    # Прерывание раньше текущей оценки задержку не уменьшает
+    health.record_cut_off("model", 1.0)
+    assert health.models["model"]["latency"] == entry["latency"]
+
+
+def test_race_records_losers_before_saving(update_news, stub):
+    generator = update_news
+    winner = generator.text_models[0]
+    stub.config["model_latency"] = {model: (0.05 if model == winner else 3.0) for model in generator.text_models}
+
+    generator._race_models(generator.text_models, 10)
+    generator.model_health.save()
+    saved = ModelHealth().models
+    assert set(saved) == set(generator.text_models)
+    assert all(saved[model]["failures"] == 0 for model in generator.text_models)
+
+
+def test_deadline_cut_off_is_not_a_failure(update_news, stub):
+    generator = update_news
+    stub.config["text_latency"] = 3.0
+
+    assert generator._race_models(generator.text_models, 0.5) is None
+    assert all(generator.model_health.models[model]["failures"] == 0 for model in generator.text_models)
+
+
+def test_model_errors_are_failures(update_news, stub):
+    generator = update_news
+    stub.config["error_rate"] = 1.0
+
+    assert generator._race_models(generator.text_models, 5) is None
+    assert all(generator.model_health.models[model]["failures"] == 1 for model in generator.text_models)
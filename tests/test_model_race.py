@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import time
+
+from conftest import ROOT
+
+SCRIPT = os.path.join(ROOT, "update-news.py")
+
+RACE = (
+    "import importlib.util, sys; sys.path.insert(0, {root!r}); "
+    "spec = importlib.util.spec_from_file_location('update_news', {path!r}); "
+    "module = importlib.util.module_from_spec(spec); spec.loader.exec_module(module); "
+    "generator = module.ContentGenerator(); "
+    "print(generator._race_models(generator.text_models, 10)[-40:])"
+)
+
+
+def slow_losers(stub, models, winner, latency):
+    stub.config["model_latency"] = {model: (0.05 if model == winner else latency) for model in models}
+
+
+def test_race_returns_first_answer(update_news, stub):
+    generator = update_news
+    winner = generator.text_models[2]
+    slow_losers(stub, generator.text_models, winner, 3.0)
+
+    started = time.perf_counter()
+    article = generator._race_models(generator.text_models, 10)
+    assert time.perf_counter() - started < 1.0
+    assert article.endswith(f"({winner})")
+    assert generator.model_health.models[winner]["success"] > 0.5
+
+
+def test_losers_do_not_hold_the_process_open(tmp_path, stub):
+    slow_losers(stub, ["microsoft/DialoGPT-medium", "facebook/blenderbot-400M-distill",
+                       "mosaicml/mpt-7b-chat", "togethercomputer/RedPajama-INCITE-7B-Chat"],
+                "mosaicml/mpt-7b-chat", 5.0)
+    env = dict(os.environ, HF_API_BASE=stub.base_url)
+
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", RACE.format(root=ROOT, path=SCRIPT)],
+                               cwd=tmp_path, env=env, capture_output=True, text=True, timeout=30)
+    assert completed.returncode == 0, completed.stderr
+    assert "(mosaicml/mpt-7b-chat)" in completed.stdout
+    assert time.perf_counter() - started < 4.0
@@ -0,0 +1,44 @@
+import os
+import random
+
+import pytest
+
+from ngram_model import NgramModel, train
+
+CORPUS = [
+    "Новая модель понимает длинные тексты. Исследователи показали, что модель работает быстрее.",
+    "Компания представила робота. Робот понимает речь и работает в лаборатории.",
+]
+
+
+def test_empty_corpus_is_refused(tmp_path):
+    path = str(tmp_path / "ngram.bin")
+    with pytest.raises(ValueError):
+        train(["", "   "], path)
+    assert not os.path.exists(path)
+    assert NgramModel.load(path) is None
+
+
+def test_generation_uses_corpus_words_and_stops(tmp_path):
+    path = str(tmp_path / "ngram.bin")
+    train(CORPUS, path)
+    model = NgramModel.load(path)
+
+    # Корпус короче min_words: число перезапусков ограничено, генерация завершается
+    article = model.generate(random.Random(1), min_words=10_000, max_restarts=5)
+    vocabulary = set(" ".join(CORPUS).replace(".", " ").replace(",", " ").split())
+    assert article and set(article.replace(".", " ").replace(",", " ").split()) <= vocabulary
+    assert article.count("\n\n") <= 5
+
+
+def test_local_article_pool_keeps_cached_responses(update_news, tmp_path, monkeypatch):
+    generator = update_news
+    train(CORPUS, str(tmp_path / "ngram.bin"))
+    generator.ngram_model = NgramModel.load(str(tmp_path / "ngram.bin"))
+    generator.response_cache.put("model", {"inputs": "запрос"}, "Ответ модели из кэша")
+
+    pools = []
+    monkeypatch.setattr(random, "choice", lambda pool: pools.append(pool) or pool[-1])
+    assert generator.generate_local_article() == "Ответ модели из кэша"
+    # Текст n-граммной модели заменяет встроенные темы, ответы из кэша остаются в пуле
+    assert len(pools[0]) == 2 and pools[0][0]
@@ -0,0 +1,39 @@
+import json
+import threading
+
+from profiling import Profiler
+
+
+def download_in_worker():
+    return sum(range(10000))
+
+
+def test_worker_threads_are_profiled_under_their_stage(tmp_path):
+    profiler = Profiler(str(tmp_path / "profile"))
+    try:
+        with profiler.stage("image"):
+            worker = threading.Thread(target=profiler.worker(download_in_worker))
+            worker.start()
+            worker.join()
+        with profiler.stage("tilda"):
+            pass
+    finally:
+        profiler.finish(__file__)
+
+    with open(tmp_path / "profile" / "report.json", encoding="utf-8") as f:
+        stages = json.load(f)["stages"]
+
+    def functions(stage):
+        return {entry["function"].rsplit("(", 1)[1] for entry in stages[stage]["top_cumulative"]}
+
+    assert "download_in_worker)" in functions("image")
+    assert "download_in_worker)" not in functions("tilda")
+    assert len(profiler.stages["image"]["profiles"]) == 2
+
+
+def test_worker_outside_a_stage_is_unchanged(tmp_path):
+    profiler = Profiler(str(tmp_path / "profile"))
+    try:
+        assert profiler.worker(download_in_worker) is download_in_worker
+    finally:
+        profiler.finish(__file__)
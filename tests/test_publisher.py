@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+import publisher
+from article_archive import ArticleArchive
+from publisher import Outbox, Publisher, idempotency_key
+
+
+def records(count):
+    return [{"title": f"Статья {number}", "date": "01.01.2025 10:00", "content": f"Текст {number}",
+             "tags": ["AI"]} for number in range(count)]
+
+
+@pytest.fixture(autouse=True)
+def short_backoff(monkeypatch):
+    monkeypatch.setattr(publisher, "BASE_BACKOFF", 0.05)
+
+
+def test_outbox_survives_restart(tmp_path, stub):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    for record in records(5):
+        outbox.add(record)
+    stub.config["error_rate"] = 1.0
+    assert Publisher(stub.base_url + "/cms", outbox=outbox).flush() == {"sent": 0, "retry": 5, "failed": 0}
+    outbox.close()
+
+    # Новый процесс видит ту же очередь и досылает её
+    stub.config["error_rate"] = 0.0
+    outbox = Outbox(path)
+    assert outbox.counts() == {"pending": 5}
+    results = Publisher(stub.base_url + "/cms", outbox=outbox).flush(deadline=5)
+    assert results["sent"] == 5
+    assert outbox.counts() == {"sent": 5}
+    assert set(stub.published) == {idempotency_key(record) for record in records(5)}
+
+
+def test_rate_limit_honours_retry_after(tmp_path, stub):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    for record in records(3):
+        outbox.add(record)
+    stub.config.update(rate_limit_rate=1.0, retry_after=1)
+    started = time.time()
+    Publisher(stub.base_url + "/cms", outbox=outbox).flush()
+
+    (attempts, error, next_attempt), = set(outbox.connection.execute(
+        "SELECT attempts, substr(last_error, 1, 3), round(next_attempt - ?) FROM outbox", (started,)))
+    assert (attempts, error, next_attempt) == (1, "429", 1.0)
+
+    stub.config["rate_limit_rate"] = 0.0
+    results = Publisher(stub.base_url + "/cms", outbox=outbox).flush(deadline=5)
+    assert results["sent"] == 3
+    assert time.time() - started >= 1.0
+
+
+def test_resend_after_lost_response_uses_same_keys(tmp_path, stub):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    for record in records(4):
+        outbox.add(record)
+        # Повторная постановка той же записи не создаёт дубликата
+        assert not outbox.add(record)
+
+    # CMS принимает пачку, но ответ не успевает дойти до клиента
+    stub.config["publish_latency"] = 0.5
+    assert Publisher(stub.base_url + "/cms", outbox=outbox, timeout=0.1).flush()["retry"] == 4
+    time.sleep(0.6)
+
+    stub.config["publish_latency"] = 0.0
+    assert Publisher(stub.base_url + "/cms", outbox=outbox).flush(deadline=5)["sent"] == 4
+    assert stub.published == {idempotency_key(record): 2 for record in records(4)}
+    assert outbox.counts() == {"sent": 4}
+
+
+def test_updated_archive_record_is_enqueued_again(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    with ArticleArchive(str(tmp_path / "articles.db")) as archive:
+        first, second = (archive.append(record) for record in records(2))
+        assert outbox.add_archive(archive) == 2
+
+        archive.replace_image(first, "images/ready.jpg")
+        assert outbox.add_archive(archive) == 1
+        assert outbox.add_archive(archive) == 0
+
+    rows = outbox.due(10)
+    assert [article_id for _, _, article_id, _, _ in rows] == [first, second, first]
+    assert rows[-1][3]["image_path"] == "images/ready.jpg"
@@ -0,0 +1,39 @@
+import random
+
+from similarity_index import SimilarityIndex
+
+WORDS = ["модель", "нейросеть", "данные", "обучение", "архитектура", "компания", "исследование",
+         "алгоритм", "робот", "зрение", "язык", "текст", "память", "скорость", "точность", "прогноз"]
+
+
+def text(seed, length=200):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randrange(50)) for _ in range(length))
+
+
+def test_near_duplicates_are_found_after_reopening(tmp_path):
+    path = str(tmp_path / "similarity.db")
+    index = SimilarityIndex(path, threshold=0.85)
+    for seed in range(50):
+        index.add(text(seed))
+    index.close()
+
+    index = SimilarityIndex(path, threshold=0.85)
+    assert index.most_similar(text(7)) > 0.95
+    # Правка пары слов почти не меняет сходство
+    edited = text(7).split()
+    edited[100:102] = ["новое", "слово"]
+    assert index.most_similar(" ".join(edited)) > 0.85
+    assert index.most_similar(text(1000)) < 0.3
+
+
+def test_admit_regenerates_duplicates(tmp_path):
+    index = SimilarityIndex(str(tmp_path / "similarity.db"), threshold=0.85)
+    index.add(text(1))
+
+    candidates = iter([text(1), text(2)])
+    assert index.admit(text(1), lambda: next(candidates), attempts=3) == text(2)
+    assert index.most_similar(text(2)) > 0.95
+
+    # Уникальнее не получилось: публикуется наименее похожий вариант
+    assert index.admit(text(1), lambda: text(2), attempts=2) == text(1)
@@ -0,0 +1,37 @@
+from article_archive import ArticleArchive
+from site_builder import SiteBuilder
+
+
+def record(number):
+    return {"title": f"Статья {number}", "date": "01.01.2025 10:00", "content": f"Текст {number}",
+            "short_description": f"Текст {number}", "tags": ["AI"], "image_path": f"images/{number}.jpg"}
+
+
+def build(tmp_path, archive):
+    return SiteBuilder(str(tmp_path / "site"), page_size=2, archive=archive).build()
+
+
+def test_only_pages_touched_by_new_articles_are_rebuilt(tmp_path):
+    with ArticleArchive(str(tmp_path / "articles.db")) as archive:
+        for number in range(1, 4):
+            archive.append(record(number))
+        assert set(build(tmp_path, archive)) == {
+            "articles/1.html", "articles/2.html", "articles/3.html",
+            "page/1.html", "page/2.html", "index.html", "current-news.html"}
+        assert build(tmp_path, archive) == []
+
+        archive.append(record(4))
+        # Новая статья попадает на страницу 2; страница 1 не меняется
+        assert set(build(tmp_path, archive)) == {"articles/4.html", "page/2.html", "index.html", "current-news.html"}
+    assert (tmp_path / "site" / "articles" / "4.html.gz").exists()
+
+
+def test_replaced_image_rebuilds_the_article_page(tmp_path):
+    with ArticleArchive(str(tmp_path / "articles.db")) as archive:
+        for number in range(1, 4):
+            archive.append(record(number))
+        build(tmp_path, archive)
+
+        archive.replace_image(1, "images/ready.jpg")
+        assert build(tmp_path, archive) == ["articles/1.html"]
+    assert "images/ready.jpg" in (tmp_path / "site" / "articles" / "1.html").read_text(encoding="utf-8")
@@ -0,0 +1,55 @@
+import os
+import random
+
+import uniqueness_index
+from uniqueness_index import HEADER, UniquenessIndex
+
+DIMENSIONS = [7, 11, 13]
+
+
+def test_every_combination_is_drawn_once_across_restarts(tmp_path):
+    path = str(tmp_path / "combinations.idx")
+    rng = random.Random(1)
+    seen = []
+    while True:
+        # Каждые 100 выдач — новый процесс, читающий снимок и журнал
+        index = UniquenessIndex(DIMENSIONS, path)
+        batch = [index.draw(rng) for _ in range(100)]
+        seen += [combination for combination in batch if combination is not None]
+        if None in batch:
+            break
+    assert len(seen) == len(set(seen)) == 7 * 11 * 13
+    assert UniquenessIndex(DIMENSIONS, path).remaining() == 0
+
+
+def test_journal_is_compacted_into_the_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(uniqueness_index, "JOURNAL_MIN", 16)
+    path = str(tmp_path / "combinations.idx")
+    index = UniquenessIndex([1000, 1000], path)
+    for _ in range(500):
+        index.draw()
+        snapshot = HEADER.size + 16 * index.snapshot_pairs
+        # Журнал не длиннее снимка: файл и чтение растут вместе с состоянием, а не с числом выдач
+        assert index.journal <= max(16, index.snapshot_pairs)
+        assert os.path.getsize(path) == snapshot + 8 * index.journal
+
+    reopened = UniquenessIndex([1000, 1000], path)
+    assert (reopened.drawn, reopened.swaps) == (index.drawn, index.swaps)
+
+
+def test_torn_journal_record_is_ignored(tmp_path):
+    path = str(tmp_path / "combinations.idx")
+    index = UniquenessIndex(DIMENSIONS, path)
+    drawn = [index.draw() for _ in range(10)]
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+
+    reopened = UniquenessIndex(DIMENSIONS, path)
+    assert reopened.drawn == 10
+    drawn += [reopened.draw() for _ in range(5)]
+    assert len(set(drawn)) == 15
+
+    # Следующие записи журнала не сдвинуты оборванной
+    reopened = UniquenessIndex(DIMENSIONS, path)
+    assert (reopened.drawn, reopened.swaps) == (15, UniquenessIndex(DIMENSIONS, path).swaps)
+    assert reopened.draw() not in drawn
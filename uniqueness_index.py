@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import random
+import struct
+from array import array
+
+MAGIC = b'UIDX2'
+LEGACY_MAGIC = b'UIDX1'
+HEADER = struct.Struct('<5sQQQ')
+POSITION = struct.Struct('<Q')
+# Журнал короче этого числа записей не сворачивается в снимок
+JOURNAL_MIN = 1024
+
+
+class UniquenessIndex:
+    """Учёт выданных комбинаций шаблонной статьи
+
+    Пространство комбинаций нумеруется смешанной системой счисления по
+    размерам словарей, а новый номер берётся ленивой перестановкой
+    Фишера — Йетса: за O(1) и только из ещё не выданных, без повторных попыток.
+
+    Хранятся только позиции перестановки, изменённые и ещё не выданные:
+    их не больше min(выдано, осталось). Битовая карта выданных номеров,
+    как в формате UIDX1, не нужна — её никто не читал, и она убрана.
+
+    Файл — снимок перестановки (заголовок и пары позиций) и журнал: каждая
+    выдача дописывает в конец 8 байт выбранной позиции, а при чтении журнал
+    проигрывается поверх снимка. Когда записей в журнале становится больше,
+    чем пар в снимке (и не меньше JOURNAL_MIN), снимок переписывается и
+    журнал обнуляется: переписываний O(log n), чтение не дольше пары снимков.
+    """
+
+    def __init__(self, dimensions, path=None):
+        self.dimensions = list(dimensions)
+        self.path = path or os.environ.get('UNIQUENESS_INDEX', 'combinations.idx')
+        self.capacity = 1
+        for size in self.dimensions:
+            self.capacity *= size
+
+        self.drawn = 0
+        self.swaps = {}
+        # Пар в снимке и записей в журнале после него
+        self.snapshot_pairs = 0
+        self.journal = 0
+        self._load()
+
+    def _load(self):
+        """Чтение снимка и журнала; при смене словарей индекс начинается заново"""
+        if not os.path.exists(self.path):
+            return
+
+        torn = 0
+        with open(self.path, 'rb') as f:
+            magic, capacity, drawn, swap_count = HEADER.unpack(f.read(HEADER.size))
+            known = magic in (MAGIC, LEGACY_MAGIC) and capacity == self.capacity
+            if known:
+                if magic == LEGACY_MAGIC:
+                    # Прежний формат хранил ещё и битовую карту выданных номеров
+                    f.seek((self.capacity + 7) // 8, os.SEEK_CUR)
+                self.drawn = drawn
+                self.snapshot_pairs = swap_count
+                pairs = array('Q')
+                pairs.frombytes(f.read(swap_count * 2 * pairs.itemsize))
+                self.swaps = dict(zip(pairs[0::2], pairs[1::2]))
+
+                journal = f.read()
+                # Недописанная при сбое последняя запись отбрасывается, файл переписывается без неё
+                torn = len(journal) % POSITION.size
+                journal = journal[:len(journal) - torn]
+                for (position,) in POSITION.iter_unpack(journal):
+                    self._take(position)
+                self.journal = len(journal) // POSITION.size
+
+        if not known:
+            print("⚠️ Словари изменились, индекс уникальности начат заново")
+        if not known or magic == LEGACY_MAGIC or torn or self._journal_full():
+            self.save()
+
+    def save(self):
+        """Атомарная запись снимка с пустым журналом"""
+        pairs = array('Q')
+        for position, value in self.swaps.items():
+            pairs.extend((position, value))
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.capacity, self.drawn, len(self.swaps)))
+            f.write(pairs.tobytes())
+        os.replace(tmp_path, self.path)
+        self.snapshot_pairs = len(self.swaps)
+        self.journal = 0
+
+    def _journal_full(self):
+        return self.journal > max(JOURNAL_MIN, self.snapshot_pairs)
+
+    def encode(self, indices):
+        """Номер комбинации по индексам в словарях"""
+        number = 0
+        for index, size in zip(indices, self.dimensions):
+            number = number * size + index
+        return number
+
+    def decode(self, number):
+        """Индексы в словарях по номеру комбинации"""
+        indices = []
+        for size in reversed(self.dimensions):
+            number, index = divmod(number, size)
+            indices.append(index)
+        return tuple(reversed(indices))
+
+    def remaining(self):
+        """Сколько уникальных комбинаций ещё осталось"""
+        return self.capacity - self.drawn
+
+    def _take(self, position):
+        """Шаг перестановки: номер с позиции position меняется местами с первым невыданным"""
+        number = self.swaps.pop(position, position)
+        if position != self.drawn:
+            self.swaps[position] = self.swaps.pop(self.drawn, self.drawn)
+        self.drawn += 1
+        return number
+
+    def draw(self, rng=random):
+        """Случайная ещё не выданная комбинация или None, если всё выдано"""
+        if self.drawn >= self.capacity:
+            return None
+
+        if not os.path.exists(self.path):
+            self.save()
+        position = rng.randrange(self.drawn, self.capacity)
+        number = self._take(position)
+        with open(self.path, 'ab') as f:
+            f.write(POSITION.pack(position))
+        self.journal += 1
+        if self._journal_full():
+            self.save()
+        return self.decode(number)
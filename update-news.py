@@ -2,75 +2,296 @@
 # -*- coding: utf-8 -*-
 
 import requests
+import argparse
 import datetime
 import os
 import json
+import queue
 import time
 import random
+import sys
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+from artifact_store import ArtifactStore
+from article_archive import ArticleArchive
+from similarity_index import SimilarityIndex
+from metrics import Metrics
+from image_variants import ImageVariants, srcset
+from model_health import ModelHealth
+from response_cache import ResponseCache
+from ngram_model import NgramModel
+from image_jobs import ImageJobs
+from providers import Deadline, Provider, ProviderChain, cached_default_image, generation_budget
+from profiling import Profiler, add_profile_arguments
+
+HF_API_BASE = os.environ.get('HF_API_BASE', 'https://api-inference.huggingface.co')
+# Собственный предел ожидания одной текстовой модели, с
+MODEL_TIMEOUT = 45
+UNSPLASH_BASE = os.environ.get('UNSPLASH_BASE', 'https://images.unsplash.com')
 
 class ContentGenerator:
-    def __init__(self):
+    def __init__(self, profiler=None):
         self.hf_token = os.environ.get('HF_API_TOKEN', '')
+        self.stage_timings = {}
+        self.profiler = profiler
+        self.artifacts = ArtifactStore()
+        self.archive = ArticleArchive()
+        self.similarity = SimilarityIndex()
+        self.metrics = Metrics()
+        self.image_variants = ImageVariants()
         
-    def generate_article(self):
-        """Генерация статьи через бесплатный API"""
-        print("🔄 Генерация статьи...")
+        # Stable Diffusion при холодном старте: статья выходит с временным изображением
+        self.image_jobs = ImageJobs(self.artifacts, self.archive, metrics=self.metrics)
+        self.image_jobs_enabled = os.environ.get('HF_IMAGE_JOBS', '1') != '0'
+        self.pending_image_job = None
         
-        # Пробуем разные бесплатные модели
-        models = [
+        # Бесплатные модели, которые опрашиваются одновременно
+        self.text_models = [
             "microsoft/DialoGPT-medium",
             "facebook/blenderbot-400M-distill",
             "mosaicml/mpt-7b-chat",
             "togethercomputer/RedPajama-INCITE-7B-Chat"
         ]
+        # Общий лимит на этап текста (секунды) и режим гонки моделей
+        self.text_deadline = float(os.environ.get('HF_TEXT_DEADLINE', '60'))
+        self.race_models = os.environ.get('HF_RACE_MODELS', '1') != '0'
+        # Здоровье моделей между запусками: порядок опроса и отключение сбойных
+        self.model_health = ModelHealth()
+        # Ответы моделей: свежие публикуются без запроса, устаревшие — с обновлением в фоне
+        self.response_cache = ResponseCache()
+        self.cache_swr = os.environ.get('HF_CACHE_SWR', '1') != '0'
+        self._refresh_thread = None
+        # Офлайн-модель, обученная на архиве статей (python ngram_model.py build)
+        self.ngram_model = NgramModel.load()
         
-        for model in models:
-            try:
-                headers = {
-                    "Authorization": f"Bearer {self.hf_token}" if self.hf_token else "",
-                    "Content-Type": "application/json"
-                }
-                
-                prompt = """Напиши новостную статью о последних достижениях в области искусственного интеллекта. 
+        # Один пул соединений на все запросы к API
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=len(self.text_models) + 2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Цепочки источников: лучший результат в пределах общего бюджета
+        self.budget = generation_budget()
+        self.text_chain = ProviderChain("text", [
+            Provider("hf_cache", self._cached_hf_article, instant=True),
+            Provider("hf_models", self._generate_hf_article),
+            Provider("hf_cache_stale", lambda timeout: self._take_cached(allow_stale=True)[0], instant=True),
+            Provider("local", lambda timeout: self.generate_local_article(), instant=True)
+        ], self.metrics)
+        self.image_chain = ProviderChain("image", [
+            Provider("stable_diffusion", self._generate_sd_image, weight=4),
+            Provider("unsplash", self.download_placeholder),
+            Provider("cached_default", lambda timeout: cached_default_image(self.artifacts), instant=True)
+        ], self.metrics)
+        
+    def _hf_headers(self):
+        """Заголовки для Hugging Face API"""
+        return {
+            "Authorization": f"Bearer {self.hf_token}" if self.hf_token else "",
+            "Content-Type": "application/json"
+        }
+
+    def _article_payload(self):
+        """Запрос на генерацию статьи"""
+        prompt = """Напиши новостную статью о последних достижениях в области искусственного интеллекта. 
 Опиши новые технологии и их применение. Объем: 300-400 слов. Только текст без заголовков."""
-                
-                payload = {
-                    "inputs": prompt,
-                    "parameters": {
-                        "max_length": 500,
-                        "temperature": 0.9,
-                        "do_sample": True,
-                        "return_full_text": False
-                    }
-                }
-                
-                print(f"Пробуем модель: {model}")
-                response = requests.post(
-                    f"https://api-inference.huggingface.co/models/{model}",
-                    headers=headers,
+        
+        return {
+            "inputs": prompt,
+            "parameters": {
+                "max_length": 500,
+                "temperature": 0.9,
+                "do_sample": True,
+                "return_full_text": False
+            }
+        }
+
+    def _record_health(self, model, outcome, latency):
+        """Исход запроса в здоровье модели: ok, failed или cut_off (прерван не по вине модели)"""
+        if outcome == "cut_off":
+            self.model_health.record_cut_off(model, latency)
+        else:
+            self.model_health.record(model, outcome == "ok", latency)
+
+    def _request_model(self, model, payload, timeout, cancelled=None, session=None, report=None):
+        """Запрос к одной модели, None если ответ не подходит
+        
+        Исход передаётся в report (по умолчанию сразу в здоровье модели). Таймаут
+        короче MODEL_TIMEOUT задан общим сроком, поэтому ошибкой модели не считается.
+        """
+        if cancelled is not None and cancelled.is_set():
+            return None
+        
+        started = time.perf_counter()
+        article = None
+        outcome = "failed"
+        try:
+            with self.metrics.span("http_request_seconds", target="hf_text", model=model):
+                response = (session or self.session).post(
+                    f"{HF_API_BASE}/models/{model}",
+                    headers=self._hf_headers(),
                     json=payload,
-                    timeout=45
+                    timeout=timeout
                 )
+            self.metrics.inc("hf_responses_total", model=model, status=response.status_code)
+            
+            if response.status_code == 200:
+                result = response.json()
+                if isinstance(result, list) and len(result) > 0 and result[0].get('generated_text'):
+                    article = result[0]['generated_text'].strip()
+                    outcome = "ok"
+                    # Ответы проигравших в гонке тоже пригодятся в следующих запусках
+                    self.response_cache.put(model, payload, article)
+            return article
+        except requests.Timeout:
+            if timeout < MODEL_TIMEOUT:
+                outcome = "cut_off"
+            raise
+        finally:
+            (report or self._record_health)(model, outcome, time.perf_counter() - started)
+
+    def generate_article(self, timeout=None):
+        """Генерация статьи: модели Hugging Face, затем локальные темы"""
+        return self.text_chain.run(Deadline(timeout or self.text_deadline))
+
+    def _take_cached(self, allow_stale=False):
+        """Неопубликованный ответ моделей из кэша: (текст, свежий ли он)"""
+        article, fresh = self.response_cache.take(self.text_models, self._article_payload(), allow_stale)
+        if article:
+            print(f"🗃️ Статья из кэша ответов ({'свежая' if fresh else 'устаревшая'})")
+        return article, fresh
+
+    def _cached_hf_article(self, timeout):
+        """Свежий ответ из кэша; устаревший — только с обновлением кэша в фоне"""
+        article, fresh = self._take_cached(allow_stale=self.cache_swr)
+        if article and not fresh:
+            self._refresh_thread = threading.Thread(
+                target=self._worker(self._generate_hf_article), args=(timeout, False), daemon=True)
+            self._refresh_thread.start()
+        return article
+
+    def _generate_hf_article(self, timeout, publish=True):
+        """Генерация статьи через бесплатный API, None если модели не ответили"""
+        print("🔄 Генерация статьи..." if publish else "🔄 Обновление кэша ответов в фоне...")
+        timeout = min(timeout, self.text_deadline)
+        
+        models = self.model_health.order(self.text_models)
+        if not models:
+            print("⚠️ Все модели временно отключены")
+            return None
+        
+        try:
+            if self.race_models:
+                article = self._race_models(models, timeout)
+            else:
+                article = self._try_models_sequentially(models, timeout)
+            if article and publish:
+                self.response_cache.mark_served(article)
+            return article
+        finally:
+            self.model_health.save()
+
+    def _race_models(self, models, timeout):
+        """Одновременный запрос ко всем моделям, побеждает первый ответ
+        
+        Запросы идут в фоновых потоках через отдельную сессию, которая
+        закрывается после гонки: незавершённые запросы проигравших не занимают
+        общий пул соединений и не задерживают выход из процесса.
+        """
+        payload = self._article_payload()
+        cancelled = threading.Event()
+        results = queue.Queue()
+        session = requests.Session()
+        request_model = self._worker(self._request_model)
+        started = time.perf_counter()
+        # Исход каждой модели учитывается ровно один раз: её потоком или в конце гонки
+        unsettled = set(models)
+        lock = threading.Lock()
+        
+        def report(model, outcome, latency):
+            with lock:
+                if model not in unsettled:
+                    return
+                unsettled.discard(model)
+            self._record_health(model, outcome, latency)
+        
+        def request(model):
+            try:
+                article = request_model(model, payload, min(MODEL_TIMEOUT, timeout), cancelled, session, report)
+                results.put((model, article, None))
+            except Exception as e:
+                results.put((model, None, e))
+        
+        print(f"🏁 Опрашиваем {len(models)} моделей одновременно")
+        for model in models:
+            threading.Thread(target=request, args=(model,), daemon=True).start()
+        
+        deadline = time.monotonic() + timeout
+        try:
+            for _ in models:
+                try:
+                    model, article, error = results.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    print(f"⏰ Лимит {timeout:.1f} с на генерацию текста исчерпан")
+                    break
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    if isinstance(result, list) and len(result) > 0:
-                        article = result[0]['generated_text'].strip()
-                        print(f"✅ Статья сгенерирована моделью {model}")
-                        return article
+                if error is not None:
+                    print(f"Ошибка с моделью {model}: {error}")
+                    continue
+                if article:
+                    print(f"✅ Статья сгенерирована моделью {model}")
+                    self.metrics.inc("article_source_total", source="hf", model=model)
+                    return article
+                print(f"⚠️ Модель {model} не вернула текст")
+        finally:
+            # Остальные запросы больше не нужны: их модели не ошиблись, а ответили бы не быстрее
+            cancelled.set()
+            session.close()
+            with lock:
+                cut_off = list(unsettled)
+                unsettled.clear()
+            for model in cut_off:
+                self._record_health(model, "cut_off", time.perf_counter() - started)
+        
+        return None
+
+    def _try_models_sequentially(self, models, timeout):
+        """Последовательный перебор моделей (быстрые первыми) с общим лимитом времени"""
+        deadline = time.monotonic() + timeout
+        payload = self._article_payload()
+        
+        for model in models:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"⏰ Лимит {timeout:.1f} с на генерацию текста исчерпан")
+                break
+            
+            try:
+                print(f"Пробуем модель: {model}")
+                article = self._request_model(model, payload, min(MODEL_TIMEOUT, remaining))
+                if article:
+                    print(f"✅ Статья сгенерирована моделью {model}")
+                    self.metrics.inc("article_source_total", source="hf", model=model)
+                    return article
                 
-                time.sleep(2)  # Пауза между попытками
+                time.sleep(min(2, max(0, deadline - time.monotonic())))  # Пауза между попытками
                 
             except Exception as e:
                 print(f"Ошибка с моделью {model}: {e}")
                 continue
         
-        # Если все API не сработали, генерируем локально
-        return self.generate_local_article()
+        return None
 
     def generate_local_article(self):
-        """Локальная генерация статьи если API не работают"""
+        """Локальная генерация статьи если API не работают
+        
+        Пул — ответы моделей из кэша и текст n-граммной модели, а пока она не
+        обучена (или ничего не сгенерировала) — встроенные темы.
+        """
         print("🔄 Локальная генерация статьи...")
+        generated = self.ngram_model.generate(random) if self.ngram_model is not None else None
         
         themes = [
             """В 2024 году искусственный интеллект продолжает стремительно развиваться. Новые языковые модели демонстрируют удивительные способности в понимании и генерации текста. 
@@ -85,19 +306,23 @@ class ContentGenerator:
 Квантовые вычисления и нейроморфные процессоры promise ускорить обработку данных и сделать ИИ еще более эффективным."""
         ]
         
-        return random.choice(themes)
+        pool = ([generated] if generated else themes) + self.response_cache.texts()
+        article = random.choice(pool)
+        if article is generated:
+            print("🧮 Статья сгенерирована n-граммной моделью")
+        return article
+
+    def generate_image(self, timeout=None):
+        """Изображение: Stable Diffusion, затем Unsplash, затем последнее сохранённое"""
+        return self.image_chain.run(Deadline(timeout or self.budget))
 
-    def generate_image(self):
-        """Генерация изображения через бесплатный API"""
+    def _generate_sd_image(self, timeout):
+        """Генерация изображения через бесплатный API, None при неудаче"""
         print("🔄 Генерация изображения...")
         
         try:
             # Пробуем Stable Diffusion
-            headers = {
-                "Authorization": f"Bearer {self.hf_token}" if self.hf_token else "",
-                "Content-Type": "application/json"
-            }
-            
+            url = f"{HF_API_BASE}/models/runwayml/stable-diffusion-v1-5"
             prompt = "futuristic artificial intelligence, neural network, digital art, blue purple colors, technology concept"
             
             payload = {
@@ -109,14 +334,18 @@ class ContentGenerator:
                 }
             }
             
-            response = requests.post(
-                "https://api-inference.huggingface.co/models/runwayml/stable-diffusion-v1-5",
-                headers=headers,
-                json=payload,
-                timeout=120
-            )
+            with self.metrics.span("http_request_seconds", target="hf_image"):
+                response = self.session.post(
+                    url,
+                    headers=self._hf_headers(),
+                    json=payload,
+                    timeout=min(120, timeout)
+                )
+            self.metrics.inc("hf_responses_total", model="runwayml/stable-diffusion-v1-5",
+                             status=response.status_code)
             
             if response.status_code == 200:
+                self.metrics.inc("http_downloaded_bytes_total", len(response.content), target="hf_image")
                 timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
                 image_filename = f"article_image_{timestamp}.jpg"
                 
@@ -124,25 +353,32 @@ class ContentGenerator:
                     f.write(response.content)
                 
                 print("✅ Изображение сгенерировано")
-                return image_filename
+                return self.artifacts.put_file(image_filename)
+            
+            if response.status_code == 503 and self.image_jobs_enabled:
+                # Модель загружается: не ждём, а ставим задание и берём временное изображение
+                estimated_time = response.json().get("estimated_time")
+                self.pending_image_job = self.image_jobs.submit(url, payload, estimated_time)
+                print(f"⏳ Модель загружается (~{estimated_time or '?'} с), изображение подставим позже")
             
         except Exception as e:
             print(f"Ошибка генерации изображения: {e}")
         
-        # Если API не сработал, используем placeholder
-        return self.download_placeholder()
+        return None
 
-    def download_placeholder(self):
+    def download_placeholder(self, timeout=30):
         """Скачивание красивого placeholder"""
         try:
             placeholders = [
-                "https://images.unsplash.com/photo-1677442135135-416f8aa26a5b?w=1024&h=512&fit=crop",
-                "https://images.unsplash.com/photo-1573164713714-d95e436ab8d6?w=1024&h=512&fit=crop",
-                "https://images.unsplash.com/photo-1535223289827-42f1e9919769?w=1024&h=512&fit=crop"
+                f"{UNSPLASH_BASE}/photo-1677442135135-416f8aa26a5b?w=1024&h=512&fit=crop",
+                f"{UNSPLASH_BASE}/photo-1573164713714-d95e436ab8d6?w=1024&h=512&fit=crop",
+                f"{UNSPLASH_BASE}/photo-1535223289827-42f1e9919769?w=1024&h=512&fit=crop"
             ]
             
-            response = requests.get(random.choice(placeholders), timeout=30)
-            response.raise_for_status()
+            with self.metrics.span("http_request_seconds", target="unsplash"):
+                response = self.session.get(random.choice(placeholders), timeout=min(30, timeout))
+                response.raise_for_status()
+            self.metrics.inc("http_downloaded_bytes_total", len(response.content), target="unsplash")
             
             timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
             image_filename = f"article_image_{timestamp}.jpg"
@@ -151,13 +387,13 @@ class ContentGenerator:
                 f.write(response.content)
             
             print("✅ Использован placeholder из Unsplash")
-            return image_filename
+            return self.artifacts.put_file(image_filename)
             
         except:
             print("⚠️ Не удалось скачать placeholder")
             return None
 
-    def prepare_for_tilda(self, article_text, image_path):
+    def prepare_for_tilda(self, article_text, image_path, image_variants=None):
         """Подготовка данных для Tilda"""
         print("📝 Подготовка данных для Tilda...")
         
@@ -169,6 +405,10 @@ class ContentGenerator:
             "short_description": article_text[:150] + "..." if len(article_text) > 150 else article_text,
             "tags": ["AI", "нейросети", "технологии"]
         }
+        if image_variants:
+            # Уменьшенные копии для srcset: {размер: {"width", "height", "jpeg", "webp"}}
+            tilda_data["image_variants"] = image_variants
+            tilda_data["image_srcset"] = {fmt: srcset(image_variants, fmt) for fmt in ("webp", "jpeg")}
         
         # Сохраняем в JSON
         with open('tilda_data.json', 'w', encoding='utf-8') as f:
@@ -178,22 +418,91 @@ class ContentGenerator:
         with open('article.txt', 'w', encoding='utf-8') as f:
             f.write(article_text)
         
+        # Добавляем в архив статей
+        self.archive.append(tilda_data)
+        
         return tilda_data
 
+    def _profile(self, stage):
+        """Профиль этапа в режиме --profile"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(stage)
+
+    def _worker(self, func):
+        """Функция для потока, запускаемого этапом: в режиме --profile её профиль идёт в этап"""
+        if self.profiler is None:
+            return func
+        return self.profiler.worker(func)
+
+    def _timed(self, stage, func, *args):
+        """Выполнение этапа с замером времени"""
+        started = time.perf_counter()
+        try:
+            with self.metrics.span("stage_seconds", stage=stage), self._profile(stage):
+                return func(*args)
+        finally:
+            self.stage_timings[stage] = round(time.perf_counter() - started, 3)
+
+    def _run_stages(self):
+        """Параллельный запуск генерации текста и изображения в общем бюджете времени"""
+        self.stage_timings = {}
+        started = time.perf_counter()
+        deadline = Deadline(self.budget)
+        # Десятая часть бюджета остаётся на отсев дубликатов и запись для Tilda
+        stage_deadline = deadline.reserve(self.budget * 0.1)
+        
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            article_future = pool.submit(self._timed, "article", self.text_chain.run, stage_deadline)
+            image_future = pool.submit(self._timed, "image", self.image_chain.run, stage_deadline)
+            article_text = article_future.result()
+            print(f"📄 Длина статьи: {len(article_text)} символов")
+            image_path = image_future.result()
+        
+        # Варианты изображения считаются в пуле процессов, пока идёт отсев дубликатов
+        variants_future = self.image_variants.submit(image_path)
+        
+        # Отсев почти-дубликатов уже опубликованных статей
+        article_text = self._timed("similarity", self.similarity.admit,
+                                   article_text, lambda: self.text_chain.run(deadline), 1)
+        
+        image_variants = self._timed("variants", self.image_variants.result, variants_future)
+        tilda_data = self._timed("tilda", self.prepare_for_tilda, article_text, image_path, image_variants)
+        self.stage_timings["total"] = round(time.perf_counter() - started, 3)
+        self.metrics.observe("stage_seconds", self.stage_timings["total"], stage="total", outcome="ok")
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(deadline.remaining())
+            self._refresh_thread = None
+        self.model_health.save()
+        
+        # Статья уже сохранена; задания опрашиваются в коротком окне, пока модель загружается
+        article_id = self.archive.last_id()
+        if self.pending_image_job:
+            self.image_jobs.attach(self.pending_image_job, article_id, image_path)
+            self.pending_image_job = None
+        if self.image_jobs.jobs:
+            self._timed("image_jobs", self.image_jobs.poll, self.session, self._hf_headers(), deadline)
+            _, tilda_data = self.archive.id_range(article_id, article_id)[0]
+        self.metrics.export()
+        self.show_timings()
+        return tilda_data
+
+    def show_timings(self):
+        """Показать время этапов и выигрыш от параллельности"""
+        t = self.stage_timings
+        sequential = t["article"] + t["image"]
+        overlapped = max(t["article"], t["image"])
+        print(f"⏱️ Этапы: статья {t['article']:.2f} с, изображение {t['image']:.2f} с, "
+              f"Tilda {t['tilda']:.2f} с, всего {t['total']:.2f} с")
+        print(f"⚡ Экономия за счёт параллельности: {sequential - overlapped:.2f} с")
+
     def generate_content(self):
         """Основная функция генерации контента"""
         print("🚀 Запуск генерации контента...")
         
         try:
-            # Генерируем статью
-            article_text = self.generate_article()
-            print(f"📄 Длина статьи: {len(article_text)} символов")
-            
-            # Генерируем изображение
-            image_path = self.generate_image()
-            
-            # Подготавливаем для Tilda
-            tilda_data = self.prepare_for_tilda(article_text, image_path)
+            # Статья и изображение готовятся параллельно, затем данные для Tilda
+            tilda_data = self._run_stages()
             
             print("✅ Генерация завершена!")
             return tilda_data
@@ -202,11 +511,20 @@ class ContentGenerator:
             print(f"❌ Ошибка: {e}")
             return None
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Генератор новостей AI через Hugging Face")
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    
     print("🤖 Генератор новостей AI")
     print("=" * 50)
     
-    generator = ContentGenerator()
+    profiler = Profiler.from_args(args)
+    with profiler.stage("init") if profiler else nullcontext():
+        generator = ContentGenerator(profiler=profiler)
     result = generator.generate_content()
     
     if result:
@@ -222,6 +540,9 @@ def main():
         print(result['content'][:200] + "...")
     else:
         print("❌ Не удалось сгенерировать контент")
+    
+    if profiler is not None and profiler.finish(__file__):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()